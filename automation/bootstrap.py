@@ -0,0 +1,77 @@
+"""组件装配 - 同一配置只构建一次 Hetzner/监控/调度/Bot 对象"""
+import functools
+import json
+import logging
+import os
+from collections import namedtuple
+from pathlib import Path
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# 优先使用 libyaml 的 C 加载器，解析结果与 SafeLoader 一致
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def load_config(config_path: str = 'config.yaml') -> dict:
+    """加载配置，源文件 mtime/大小与缓存记录完全一致时直接读取 JSON 缓存"""
+    path = Path(config_path)
+    # 每个配置文件各自一份缓存，避免同目录下的 staging.yaml 读到 config.yaml 的内容
+    cache_path = path.with_name(f'.{path.name}.cache.json')
+    st = path.stat()
+    try:
+        cached = json.loads(cache_path.read_bytes())
+        # 只认精确匹配：cp -p / 备份恢复后的旧 mtime 也会触发重新解析
+        if cached.get('mtime_ns') == st.st_mtime_ns and cached.get('size') == st.st_size:
+            return cached['config']
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    # 一次性读入字节交给 libyaml，省去逐块读取和文本层解码
+    config = yaml.load(path.read_bytes(), Loader=YamlLoader) or {}
+
+    # JSON 会把整数键转成字符串、不支持日期等类型，无法无损往返时不缓存
+    try:
+        if json.loads(json.dumps(config, ensure_ascii=False)) != config:
+            return config
+        data = json.dumps(
+            {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'config': config}, ensure_ascii=False
+        )
+    except (TypeError, ValueError):
+        return config
+
+    # 缓存里含 API Token，以 0600 权限原子写入，失败不影响启动
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"写入配置缓存失败: {e}")
+    return config
+
+
+Stack = namedtuple('Stack', ['config', 'hetzner', 'monitor', 'scheduler', 'bot'])
+
+
+@functools.lru_cache(maxsize=4)
+def build_stack(config_path: str = 'config.yaml') -> Stack:
+    """按配置路径构建并复用整套组件"""
+    # 延迟导入：telegram 依赖较重，只在真正构建组件时加载
+    from hetzner_manager import HetznerManager
+    from traffic_monitor import TrafficMonitor
+    from scheduler import TaskScheduler
+    from telegram_bot import TelegramBot
+
+    config = load_config(config_path)
+    config['_config_path'] = config_path
+
+    hetzner = HetznerManager(config['hetzner']['api_token'])
+    monitor = TrafficMonitor(hetzner, config)
+    scheduler = TaskScheduler(hetzner, config)
+    bot = TelegramBot(config, hetzner, monitor, scheduler)
+    monitor.set_telegram_bot(bot)
+    return Stack(config, hetzner, monitor, scheduler, bot)
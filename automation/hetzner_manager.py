@@ -1,9 +1,27 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta, timezone
 import time
 
+# 按 token 复用连接池，避免每次 API 调用重新建立 TCP/TLS 连接
+_SESSIONS: Dict[str, requests.Session] = {}
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    # 只重试 GET；PUT/DELETE 重发后可能拿到 404，被误判为失败而中断删除重建流程
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=100,
+        max_retries=Retry(total=3, backoff_factor=0.3, allowed_methods=frozenset({"GET"})),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class HetznerManager:
     BASE_URL = "https://api.hetzner.cloud/v1"
@@ -15,11 +33,14 @@ class HetznerManager:
             "Content-Type": "application/json"
         }
         self.logger = logging.getLogger(__name__)
+        self.session = _SESSIONS.get(api_token)
+        if self.session is None:
+            self.session = _SESSIONS.setdefault(api_token, _build_session())
     
     def _request(self, method: str, endpoint: str, **kwargs) -> Dict:
         url = f"{self.BASE_URL}/{endpoint}"
         try:
-            response = requests.request(method, url, headers=self.headers, **kwargs)
+            response = self.session.request(method, url, headers=self.headers, **kwargs)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -411,7 +432,7 @@ class HetznerManager:
                 }
                 list_url = f"{self.CF_API_BASE}/zones/{zone_id}/dns_records"
                 params = {"type": "A", "name": record_name}
-                resp = requests.get(list_url, headers=headers, params=params, timeout=15)
+                resp = self.session.get(list_url, headers=headers, params=params, timeout=15)
                 resp.raise_for_status()
                 data = resp.json()
                 records = data.get("result", [])
@@ -427,7 +448,7 @@ class HetznerManager:
                     "ttl": record.get("ttl", 1),
                     "proxied": record.get("proxied", False),
                 }
-                upd = requests.put(update_url, headers=headers, json=payload, timeout=15)
+                upd = self.session.put(update_url, headers=headers, json=payload, timeout=15)
                 upd.raise_for_status()
                 return {"success": True}
             except Exception as e:
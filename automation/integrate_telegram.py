@@ -1,27 +1,29 @@
 import sys
-import asyncio
+import threading
 
 # 在 main() 函数中添加
-from telegram_bot import TelegramBot
+from bootstrap import build_stack
 
 # ... 现有代码 ...
 
 def main():
     # ... 现有代码 ...
-    
-    hetzner = HetznerManager(config['hetzner']['api_token'])
-    monitor = TrafficMonitor(hetzner, config)
-    scheduler = TaskScheduler(hetzner, config)
-    
+
+    # 复用与 run_telegram_bot 相同的组件装配（同一配置路径只构建一次）
+    stack = build_stack(args.config)
+    config = stack.config
+    hetzner = stack.hetzner
+    monitor = stack.monitor
+    scheduler = stack.scheduler
+
     # 添加 Telegram Bot
-    telegram_bot = TelegramBot(config, hetzner, monitor, scheduler)
-    
+    telegram_bot = stack.bot
+
     # 启动 Telegram Bot
-    if telegram_bot.enabled:
-        async def start_bot():
-            await telegram_bot.initialize_commands()
-            asyncio.create_task(telegram_bot.run_polling())
-        
-        asyncio.run(start_bot())
-    
+    # initialize_commands()/run() 都是同步方法，run() 会自行创建
+    # 事件循环并一直阻塞；放到后台线程，主线程继续执行下面的监控循环
+    if telegram_bot.enabled and telegram_bot.initialize_commands():
+        bot_thread = threading.Thread(target=telegram_bot.run, daemon=True)
+        bot_thread.start()
+
     # ... 继续现有代码 ...
@@ -11,6 +11,7 @@ from hetzner_manager import HetznerManager
 from traffic_monitor import TrafficMonitor
 from scheduler import TaskScheduler
 from notifier import Notifier
+from logging_setup import JSONFormatter
 
 # 尝试导入 Telegram Bot
 try:
@@ -20,6 +21,9 @@ except ImportError:
     TELEGRAM_AVAILABLE = False
     TelegramBot = None
 
+# 优先使用 libyaml 的 C 加载器，解析结果与 SafeLoader 一致
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 def setup_logging(config: dict) -> logging.Logger:
     log_config = config['logging']
@@ -41,9 +45,12 @@ def setup_logging(config: dict) -> logging.Logger:
         backupCount=log_config['backup_count']
     )
     file_handler.setLevel(logging.DEBUG)
-    file_format = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    if log_config.get('format') == 'json':
+        file_format = JSONFormatter()
+    else:
+        file_format = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
     file_handler.setFormatter(file_format)
     logger.addHandler(file_handler)
     
@@ -53,7 +60,7 @@ def setup_logging(config: dict) -> logging.Logger:
 def load_config(config_path: str = 'config.yaml') -> dict:
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=YamlLoader)
         return config
     except FileNotFoundError:
         print(f"❌ 配置文件不存在: {config_path}")
@@ -75,7 +82,7 @@ def run_telegram_bot(bot):
     """在单独线程中运行 Telegram Bot"""
     try:
         if bot.initialize_commands():
-            bot.run_polling()
+            bot.run()
     except Exception as e:
         logging.error(f"Telegram Bot 运行错误: {e}")
 
@@ -98,6 +105,8 @@ def main():
     logger.info("=" * 70)
     logger.info("Hetzner 服务器监控系统启动")
     logger.info("=" * 70)
+    if YamlLoader is yaml.SafeLoader:
+        logger.warning("⚠️ 未检测到 libyaml，YAML 解析将使用较慢的纯 Python 实现")
     
     hetzner = HetznerManager(config['hetzner']['api_token'])
     monitor = TrafficMonitor(hetzner, config)
@@ -2,53 +2,66 @@
 import logging
 from typing import Dict, List
 
+logger = logging.getLogger(__name__)
+
 
 class Notifier:
     def __init__(self, config: Dict):
         self.config = config
-        self.logger = logging.getLogger(__name__)
+        self.logger = logger
         
         # 安全获取配置
-        notifications = config.get('notifications', {})
+        notifications = config.get('notifications') or {}
         
         # Telegram 配置（新位置）
-        self.telegram_config = config.get('telegram', {})
+        self.telegram_config = config.get('telegram') or {}
         self.telegram_enabled = self.telegram_config.get('enabled', False)
         
         # Email 配置
-        self.email_config = notifications.get('email', {})
+        self.email_config = notifications.get('email') or {}
         self.email_enabled = self.email_config.get('enabled', False)
         
-        self.logger.info(f"通知模块已初始化 (Telegram: {self.telegram_enabled}, Email: {self.email_enabled})")
+        self.logger.info(
+            "通知模块已初始化 (Telegram: %s, Email: %s)", self.telegram_enabled, self.email_enabled
+        )
     
     def notify_traffic_warning(self, results: List[Dict]):
         """流量警告通知"""
-        if not results:
+        if not results or not self.logger.isEnabledFor(logging.WARNING):
             return
         
+        lines = []
+        servers = []
         for result in results:
-            self.logger.warning(
-                f"流量警告: {result['server_name']} - "
-                f"{result['usage_percent']:.1f}% "
-                f"({result['traffic']['total']:.2f}GB)"
-            )
+            name = result['server_name']
+            usage = result['usage_percent']
+            total = result['traffic']['total']
+            lines.append("%s - %.1f%% (%.2fGB)" % (name, usage, total))
+            servers.append({'server': name, 'usage': usage, 'total_gb': total})
+        self.logger.warning("流量警告:\n%s", "\n".join(lines), extra={'servers': servers})
     
     def notify_traffic_exceeded(self, actions: List[Dict]):
         """流量超限通知"""
-        if not actions:
+        if not actions or not self.logger.isEnabledFor(logging.WARNING):
             return
         
+        lines = []
+        servers = []
         for action in actions:
-            self.logger.warning(
-                f"流量超限: {action['server']} - "
-                f"{action['traffic']:.2f}GB - "
-                f"操作: {action['action']}"
-            )
+            server = action['server']
+            traffic = action['traffic']
+            kind = action['action']
+            lines.append("%s - %.2fGB - 操作: %s" % (server, traffic, kind))
+            servers.append({'server': server, 'total_gb': traffic, 'action': kind})
+        self.logger.warning("流量超限:\n%s", "\n".join(lines), extra={'servers': servers})
     
     def notify_summary(self, summary: Dict):
         """监控摘要通知"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         self.logger.info(
-            f"监控摘要: 总计 {summary['total_servers']} 台服务器, "
-            f"超限 {len(summary.get('exceeded_servers', []))} 台, "
-            f"警告 {len(summary.get('warning_servers', []))} 台"
+            "监控摘要: 总计 %s 台服务器, 超限 %d 台, 警告 %d 台",
+            summary['total_servers'],
+            len(summary.get('exceeded_servers') or ()),
+            len(summary.get('warning_servers') or ()),
         )
@@ -3,7 +3,6 @@
 import sys
 import yaml
 import logging
-from pathlib import Path
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,28 +10,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from hetzner_manager import HetznerManager
-from traffic_monitor import TrafficMonitor
-from scheduler import TaskScheduler
-from telegram_bot import TelegramBot
+from bootstrap import YamlLoader, build_stack
 
 
 def main():
-    # 加载配置
-    with open('config.yaml') as f:
-        config = yaml.safe_load(f)
-    config['_config_path'] = 'config.yaml'
+    # 加载配置并初始化
+    stack = build_stack('config.yaml')
     
     logger.info("=" * 60)
     logger.info("Telegram Bot 启动 (v13)")
     logger.info("=" * 60)
+    if YamlLoader is yaml.SafeLoader:
+        logger.warning("⚠️ 未检测到 libyaml，YAML 解析将使用较慢的纯 Python 实现")
     
-    # 初始化
-    hetzner = HetznerManager(config['hetzner']['api_token'])
-    monitor = TrafficMonitor(hetzner, config)
-    scheduler = TaskScheduler(hetzner, config)
-    bot = TelegramBot(config, hetzner, monitor, scheduler)
-    monitor.set_telegram_bot(bot)
+    bot = stack.bot
     
     if not bot.enabled:
         logger.error("❌ Bot 未启用")
@@ -40,7 +31,7 @@ def main():
     
     # 初始化并运行
     if bot.initialize_commands():
-        bot.run_polling()
+        bot.run()
     else:
         logger.error("❌ 初始化失败")
 
@@ -11,6 +11,8 @@ except ImportError:
     SCHEDULE_AVAILABLE = False
     schedule = None
 
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 
 class TaskScheduler:
     def __init__(self, hetzner, config):
@@ -29,23 +31,25 @@ class TaskScheduler:
         path = self._config_path()
         try:
             with open(path, 'w', encoding='utf-8') as f:
-                yaml.safe_dump(self.config, f, sort_keys=False, allow_unicode=True)
+                yaml.dump(self.config, f, Dumper=YamlDumper, sort_keys=False, allow_unicode=True)
         except Exception as e:
             self.logger.error(f"保存配置失败: {e}")
 
     def is_enabled(self):
         return self._enabled
 
-    def enable(self):
+    def enable(self, save: bool = True):
         self._enabled = True
         self.config['scheduler']['enabled'] = True
-        self._save_config()
+        if save:
+            self._save_config()
         self.logger.info("调度器已启用")
 
-    def disable(self):
+    def disable(self, save: bool = True):
         self._enabled = False
         self.config['scheduler']['enabled'] = False
-        self._save_config()
+        if save:
+            self._save_config()
         self.logger.info("调度器已禁用")
 
     def _clear_jobs(self):
@@ -151,6 +155,27 @@ class TaskScheduler:
         else:
             self.logger.error(f"未知定时任务: {action}")
 
+    @staticmethod
+    def _job_tag(action: str, at_time: str) -> str:
+        return f"{action}@{at_time}"
+
+    @staticmethod
+    def task_pairs(tasks: List[Dict]) -> set:
+        """把任务配置展开成 (action, time) 集合，便于比较前后差异"""
+        return {(task.get('action'), at_time) for task in tasks for at_time in task.get('times', [])}
+
+    def add_tasks(self, pairs) -> None:
+        if not SCHEDULE_AVAILABLE:
+            return
+        for action, at_time in pairs:
+            schedule.every().day.at(at_time).do(self._run_task, action=action).tag(self._job_tag(action, at_time))
+
+    def remove_tasks(self, pairs) -> None:
+        if not SCHEDULE_AVAILABLE:
+            return
+        for action, at_time in pairs:
+            schedule.clear(self._job_tag(action, at_time))
+
     def load_tasks(self):
         if not self._enabled:
             self.logger.info("定时任务调度已禁用")
@@ -168,7 +193,7 @@ class TaskScheduler:
             action = task.get('action')
             times = task.get('times', [])
             for at_time in times:
-                schedule.every().day.at(at_time).do(self._run_task, action=action)
+                schedule.every().day.at(at_time).do(self._run_task, action=action).tag(self._job_tag(action, at_time))
                 count += 1
         self.logger.info(f"已加载 {count} 个定时任务")
 
@@ -1,15 +1,27 @@
 """Telegram Bot - Hetzner Monitor commands (python-telegram-bot v20+)"""
-from decimal import Decimal, ROUND_HALF_UP
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
+import copy
 import json
 import logging
 import os
+import re
 import socket
 import threading
 import time
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
 import yaml
 
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 try:
     from telegram import Update
     from telegram.ext import Application, CommandHandler, ContextTypes
@@ -22,8 +34,51 @@ except Exception as e:
     ContextTypes = None
     Update = None
 
+# 数值只用于展示（保留三位小数），用 float 计算即可
+GB_PER_TB = 1024.0
+BYTES_PER_TB = 1024.0 ** 4
+
+# report_state.json 里的时间格式
+REPORT_TIME_FMT = "%Y-%m-%d %H:%M"
+# /scheduleset 接受的 HH:MM
+HHMM_RE = re.compile(r"^([01]\d|2[0-3]):[0-5]\d$")
+
+THRESHOLD_EMOJIS = {10: "💧", 20: "💦", 30: "🌊", 40: "🟢", 50: "🟡", 60: "🟠", 70: "🔶", 80: "🔴", 90: "🚨", 100: "💀"}
+# 10 格进度条的全部可能形态，按已满格数索引
+PROGRESS_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
+
 
 class TelegramBot:
+    # 注册的命令，处理函数为同名的 cmd_<name> 方法
+    COMMANDS = (
+        "start", "help", "list", "status", "traffic", "today", "report", "reportstatus",
+        "reportreset", "dnstest", "dnscheck", "startserver", "stopserver", "reboot", "delete",
+        "rebuild", "snapshots", "createsnapshot", "scheduleon", "scheduleoff", "schedulestatus",
+        "scheduleset",
+    )
+    MD = "Markdown"
+    # 同时处理的更新数上限，避免慢命令阻塞后续消息
+    CONCURRENT_UPDATES = 64
+    # 整个 Bot 每秒最多发送的消息数（Telegram 全局限制约 30 条/秒）
+    REPLY_RATE = 30
+    # Telegram 单条消息上限 4096 字符
+    MAX_MESSAGE_LEN = 4096
+    # 命令处理中复用服务器列表/详情的秒数，连续执行命令时省去重复请求
+    SERVERS_CACHE_TTL = 15
+    # 主动推送的排队上限与发送间隔（同一会话官方建议不超过每秒 1 条）
+    SEND_QUEUE_SIZE = 100
+    SEND_INTERVAL = 1.0
+    # 配置写盘的合并延迟：窗口内的多次修改只写一次
+    CONFIG_FLUSH_DELAY = 0.5
+    # /schedulestatus 文本缓存秒数（主要用于限制下次执行时间的陈旧程度）
+    SCHED_STATUS_TTL = 5
+    # 保留的整点快照数，刚好覆盖最近 24 小时的逐小时增量
+    HOURLY_KEEP = 25
+    # 采集流量快照时并发查询服务器详情的线程数上限，兼顾 Hetzner API 限速
+    SNAPSHOT_WORKERS = 20
+    # 每日定时汇报时间（另有每个整点记录一次快照）
+    REPORT_TIMES = ("11:55", "23:55")
+
     def __init__(self, config, hetzner_manager, traffic_monitor, scheduler):
         self.config = config
         self.hetzner = hetzner_manager
@@ -33,7 +88,24 @@ class TelegramBot:
         self.bot_token = tg_config.get('bot_token', '')
         self.chat_id = str(tg_config.get('chat_id', ''))
         self.enabled = tg_config.get('enabled', False) and TELEGRAM_OK and bool(self.bot_token)
+        self.webhook = tg_config.get('webhook') or {}
         self.app = None
+        # report_state.json 只由本进程维护，解析一次后常驻内存
+        self._report_state: Optional[dict] = None
+        self._report_state_lock = threading.Lock()
+        self._last_state_hash: Optional[int] = None
+        self._limit_tb_cached = None
+        self._servers_cache = None
+        self._server_cache: Dict[int, tuple] = {}
+        self._msg_queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reply_tokens = float(self.REPLY_RATE)
+        self._reply_ts = time.monotonic()
+        self._chat_queues: Dict[int, asyncio.Queue] = {}
+        self._chat_workers: Dict[int, asyncio.Task] = {}
+        self._sched_status_cache: Optional[Tuple[float, str]] = None
+        self._config_dirty = False
+        self._config_flush_handle: Optional[asyncio.TimerHandle] = None
 
         self.logger = logging.getLogger(__name__)
 
@@ -45,26 +117,127 @@ class TelegramBot:
             self.logger.info(f"Chat ID: {self.chat_id}")
 
     def _send(self, msg: str) -> None:
-        if self.enabled and self.app:
+        if not (self.enabled and self.app):
+            return
+        if self._msg_queue is None:
+            self.logger.warning("Bot 尚未启动，消息未发送")
+            return
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._enqueue(msg)
+        else:
+            # 监控线程等非事件循环线程调用时，交给 Bot 所在的循环入队
+            try:
+                self._loop.call_soon_threadsafe(self._enqueue, msg)
+            except RuntimeError as e:
+                self.logger.error(f"发送失败: {e}")
+
+    def _enqueue(self, msg: str) -> None:
+        try:
+            self._msg_queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            self.logger.error("发送队列已满，消息被丢弃")
+
+    async def _sender_worker(self) -> None:
+        """单个协程按固定间隔逐条发送，突发通知不会触发 Telegram 限流"""
+        while True:
+            msg = await self._msg_queue.get()
+            await self._acquire_send_slot()
             try:
-                self.app.create_task(self.app.bot.send_message(
+                await self.app.bot.send_message(
                     chat_id=self.chat_id,
                     text=msg,
-                    parse_mode='Markdown',
-                ))
+                    parse_mode=self.MD,
+                )
             except Exception as e:
                 self.logger.error(f"发送失败: {e}")
-
-    def _limit_tb(self) -> Decimal:
-        return (Decimal(self.config['traffic']['limit_gb']) / Decimal(1024)).quantize(
-            Decimal("0.001"), rounding=ROUND_HALF_UP
-        )
+            finally:
+                self._msg_queue.task_done()
+            await asyncio.sleep(self.SEND_INTERVAL)
+
+    async def _acquire_send_slot(self) -> None:
+        """全局令牌桶，整个 Bot 每秒最多发出 REPLY_RATE 条消息"""
+        while True:
+            now = time.monotonic()
+            self._reply_tokens = min(
+                float(self.REPLY_RATE),
+                self._reply_tokens + (now - self._reply_ts) * self.REPLY_RATE,
+            )
+            self._reply_ts = now
+            if self._reply_tokens >= 1:
+                self._reply_tokens -= 1
+                return
+            await asyncio.sleep((1 - self._reply_tokens) / self.REPLY_RATE)
+
+    async def _reply(self, u: Update, text: str, parse_mode: Optional[str] = None):
+        await self._acquire_send_slot()
+        return await u.message.reply_text(text, parse_mode=parse_mode)
+
+    async def _md(self, u: Update, text: str):
+        return await self._reply(u, text, self.MD)
+
+    async def _reply_lines(self, u: Update, lines) -> None:
+        """多行结果合并成尽量少的消息发送，按行切分以不超过单条上限"""
+        chunk = []
+        size = 0
+        for line in lines:
+            if chunk and size + len(line) + 1 > self.MAX_MESSAGE_LEN:
+                await self._reply(u, "\n".join(chunk))
+                chunk = []
+                size = 0
+            chunk.append(line)
+            size += len(line) + 1
+        if chunk:
+            await self._reply(u, "\n".join(chunk))
+
+    def _get_servers(self) -> list:
+        cached = self._servers_cache
+        if cached and time.monotonic() - cached[0] < self.SERVERS_CACHE_TTL:
+            return cached[1]
+        servers = self.hetzner.get_servers()
+        self._servers_cache = (time.monotonic(), servers)
+        return servers
+
+    def _get_server(self, sid: int) -> Optional[Dict]:
+        cached = self._server_cache.get(sid)
+        if cached and time.monotonic() - cached[0] < self.SERVERS_CACHE_TTL:
+            return cached[1]
+        server = self.hetzner.get_server(sid)
+        if server:
+            self._server_cache[sid] = (time.monotonic(), server)
+        return server
+
+    def _invalidate_servers_cache(self) -> None:
+        self._servers_cache = None
+        self._server_cache.clear()
+
+    def _limit_tb(self) -> float:
+        return self._limit_cache()[1]
+
+    def _limit_cache(self) -> tuple:
+        """(limit_gb, limit_tb, 每 1% 使用率对应的字节数)，以 limit_gb 为键缓存"""
+        limit_gb = self.config['traffic']['limit_gb']
+        if self._limit_tb_cached is None or self._limit_tb_cached[0] != limit_gb:
+            limit_tb = round(float(limit_gb) / GB_PER_TB, 3)
+            self._limit_tb_cached = (limit_gb, limit_tb, BYTES_PER_TB * limit_tb / 100)
+        return self._limit_tb_cached
 
     @staticmethod
-    def _bytes_to_tb(value_bytes: float) -> Decimal:
-        return (Decimal(value_bytes) / (Decimal(1024) ** 4)).quantize(
-            Decimal("0.001"), rounding=ROUND_HALF_UP
-        )
+    def _bytes_to_tb(value_bytes: float) -> float:
+        return round(float(value_bytes) / BYTES_PER_TB, 3)
+
+    def _compute_usage(self, outbound_bytes, fallback_outbound_gb: Optional[float] = None) -> Tuple[float, float]:
+        """返回 (已用出站 TB, 使用率%)；没有字节数时退回按 GB 统计的出站量"""
+        _, limit_tb, bytes_per_pct = self._limit_cache()
+        if outbound_bytes is not None:
+            return self._bytes_to_tb(outbound_bytes), float(outbound_bytes) / bytes_per_pct
+        if fallback_outbound_gb is None:
+            return 0.0, 0.0
+        total_tb = round(fallback_outbound_gb / GB_PER_TB, 3)
+        return total_tb, total_tb / limit_tb * 100
 
     def _report_state_path(self) -> str:
         return os.environ.get("REPORT_STATE_PATH", "/opt/hetzner-monitor/report_state.json")
@@ -72,38 +245,105 @@ class TelegramBot:
     def _config_path(self) -> str:
         return self.config.get('_config_path', 'config.yaml')
 
-    def _save_config(self) -> None:
+    def _save_config_sync(self, config: Dict) -> None:
+        path = self._config_path()
+        # 写入临时文件后原子替换，避免中途崩溃留下半截 YAML
+        tmp_path = f"{path}.tmp"
         try:
-            with open(self._config_path(), 'w', encoding='utf-8') as f:
-                yaml.safe_dump(self.config, f, sort_keys=False, allow_unicode=True)
+            with open(tmp_path, 'w', encoding='utf-8', buffering=1 << 16) as f:
+                yaml.dump(config, f, Dumper=YamlDumper, sort_keys=False, allow_unicode=True)
+            os.replace(tmp_path, path)
         except Exception as e:
             self.logger.error(f"保存配置失败: {e}")
 
-    def _load_report_state(self) -> dict:
+    async def _save_config(self) -> None:
+        # 在事件循环线程上拷贝一份，工作线程序列化期间命令处理器仍可修改 self.config
+        snapshot = copy.deepcopy(self.config)
+        # YAML 序列化和写文件放到工作线程，避免阻塞事件循环
+        await asyncio.to_thread(self._save_config_sync, snapshot)
+
+    def _save_config_soon(self) -> None:
+        self._config_dirty = True
+        if self._config_flush_handle is None:
+            self._config_flush_handle = asyncio.get_running_loop().call_later(
+                self.CONFIG_FLUSH_DELAY, self._flush_config
+            )
+
+    def _flush_config(self) -> None:
+        self._config_flush_handle = None
+        if self._config_dirty:
+            self._config_dirty = False
+            asyncio.get_running_loop().create_task(self._save_config())
+
+    def _remap_server_config(self, old_id: int, new_id: int) -> None:
+        """重建后把快照/DNS 映射从旧 ID 移到新 ID；只在事件循环线程上修改 self.config"""
+        changed = False
+        snapshot_map = self.config.get('snapshot_map') or {}
+        if str(old_id) in snapshot_map:
+            snapshot_map[str(new_id)] = snapshot_map.pop(str(old_id))
+            self.config['snapshot_map'] = snapshot_map
+            changed = True
+
+        cloudflare = self.config.get('cloudflare') or {}
+        record_map = cloudflare.get('record_map') or {}
+        if str(old_id) in record_map:
+            record_map[str(new_id)] = record_map.pop(str(old_id))
+            cloudflare['record_map'] = record_map
+            self.config['cloudflare'] = cloudflare
+            changed = True
+
+        if changed:
+            self._save_config_soon()
+
+    def _read_report_state(self) -> dict:
         path = self._report_state_path()
         if not os.path.exists(path):
             return {}
         try:
-            with open(path, "r") as f:
-                return json.load(f)
+            with open(path, "rb") as f:
+                data = f.read()
+            return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
         except Exception as e:
             self.logger.warning(f"读取汇报状态失败: {e}")
             return {}
 
+    def _load_report_state(self) -> dict:
+        with self._report_state_lock:
+            if self._report_state is None:
+                self._report_state = self._read_report_state()
+            return self._report_state
+
     def _save_report_state(self, state: dict) -> None:
         path = self._report_state_path()
+        with self._report_state_lock:
+            self._report_state = state
+        # 先序列化成一块数据，写入临时文件后原子替换，避免中途崩溃留下半截 JSON
+        tmp_path = f"{path}.tmp"
         try:
-            with open(path, "w") as f:
-                json.dump(state, f)
+            data = orjson.dumps(state) if ORJSON_AVAILABLE else json.dumps(state).encode("utf-8")
+            # 内容与上次写入完全相同时跳过写盘
+            data_hash = hash(data)
+            if data_hash == self._last_state_hash:
+                return
+            with open(tmp_path, "wb", buffering=1 << 16) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._last_state_hash = data_hash
         except Exception as e:
             self.logger.warning(f"写入汇报状态失败: {e}")
 
     def _collect_traffic_snapshot(self) -> dict:
         servers = self.hetzner.get_servers()
+        if not servers:
+            return {}
+        # 逐台查询详情，并发发出请求，总耗时约为一次往返
+        workers = min(self.SNAPSHOT_WORKERS, len(servers))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            details = list(pool.map(self.hetzner.get_server, (server["id"] for server in servers)))
         snapshot = {}
-        for server in servers:
+        for server, detail in zip(servers, details):
             sid = str(server["id"])
-            detail = self.hetzner.get_server(server["id"]) or {}
+            detail = detail or {}
             snapshot[sid] = {
                 "name": server.get("name", sid),
                 "outbound_bytes": detail.get("outgoing_traffic"),
@@ -111,19 +351,26 @@ class TelegramBot:
             }
         return snapshot
 
-    def _record_hourly_snapshot(self, now: datetime) -> None:
-        hour_key = now.strftime("%Y-%m-%d %H:00")
-        state = self._load_report_state()
+    def _record_hourly_snapshot(self, now: datetime, state: Optional[dict] = None) -> None:
+        """记录整点快照；传入 state 时只修改内存，由调用方统一保存"""
+        save = state is None
+        if save:
+            state = self._load_report_state()
+        # 与 "%Y-%m-%d %H:00" 相同，整数格式化比 strftime 快
+        hour_key = f"{now.year:04d}-{now.month:02d}-{now.day:02d} {now.hour:02d}:00"
         hourly = state.get("hourly", {})
         if hour_key in hourly:
             return
         hourly[hour_key] = self._collect_traffic_snapshot()
+        for key in sorted(hourly)[:-self.HOURLY_KEEP]:
+            del hourly[key]
         state["hourly"] = hourly
-        self._save_report_state(state)
+        if save:
+            self._save_report_state(state)
 
-    def _format_hourly_report(self, hours: int = 24) -> str:
-        state = self._load_report_state()
-        hourly = state.get("hourly", {})
+    def _format_hourly_report(self, hours: int = 24, hourly: Optional[dict] = None) -> str:
+        if hourly is None:
+            hourly = self._load_report_state().get("hourly", {})
         if not hourly:
             return "小时分析: 暂无数据"
 
@@ -153,30 +400,31 @@ class TelegramBot:
         for sid, data in servers.items():
             lines = [f"🖥 *{data['name']}* (`{sid}`)"]
             for label, delta_tb in data["deltas"]:
-                val = f"{delta_tb} TB" if delta_tb is not None else "N/A"
+                val = f"{delta_tb:.3f} TB" if delta_tb is not None else "N/A"
                 lines.append(f"{label}: {val}")
             parts.append("\n".join(lines))
         return "\n\n".join(parts)
 
-    def _send_scheduled_report(self, label: str) -> None:
+    def _build_scheduled_report(self, label: str) -> str:
+        """生成汇报文本并推进汇报区间（含阻塞的 API 调用）"""
         now = datetime.now().astimezone()
-        self._record_hourly_snapshot(now)
+        now_text = now.strftime(REPORT_TIME_FMT)
         state = self._load_report_state()
+        self._record_hourly_snapshot(now, state)
         last_time = state.get("last_time")
         last_snapshot = state.get("servers", {})
 
         current_snapshot = self._collect_traffic_snapshot()
         parts = [f"🕒 *定时流量汇报* ({label})"]
         if last_time:
-            parts.append(f"统计区间: {last_time} ~ {now.strftime('%Y-%m-%d %H:%M')}")
+            parts.append(f"统计区间: {last_time} ~ {now_text}")
         else:
             parts.append("统计区间: 首次统计（仅显示累计出站）")
 
         limit_tb = self._limit_tb()
         for sid, data in current_snapshot.items():
             outbound_bytes = data.get("outbound_bytes")
-            total_tb = self._bytes_to_tb(outbound_bytes) if outbound_bytes is not None else Decimal("0.000")
-            usage = float((Decimal(outbound_bytes) / (Decimal(1024) ** 4) / limit_tb) * 100) if outbound_bytes is not None else 0.0
+            total_tb, usage = self._compute_usage(outbound_bytes)
 
             delta_tb = None
             last = last_snapshot.get(sid, {})
@@ -186,66 +434,70 @@ class TelegramBot:
                 if delta >= 0:
                     delta_tb = self._bytes_to_tb(delta)
 
-            delta_line = f"区间增量: *{delta_tb} TB*" if delta_tb is not None else "区间增量: N/A"
+            delta_line = f"区间增量: *{delta_tb:.3f} TB*" if delta_tb is not None else "区间增量: N/A"
             parts.append(
                 f"🖥 *{data.get('name')}* (`{sid}`)\n"
-                f"💾 累计出站: *{total_tb} TB* / {limit_tb} TB\n"
+                f"💾 累计出站: *{total_tb:.3f} TB* / {limit_tb:.3f} TB\n"
                 f"📈 使用率: *{usage:.2f}%*\n"
                 f"📊 {delta_line}"
             )
 
-        parts.append(self._format_hourly_report())
-        self._send("\n\n".join(parts))
-        state = {
-            "last_time": now.strftime("%Y-%m-%d %H:%M"),
-            "servers": current_snapshot,
-            "hourly": state.get("hourly", {}),
-        }
+        parts.append(self._format_hourly_report(hourly=state.get("hourly", {})))
+        state["last_time"] = now_text
+        state["servers"] = current_snapshot
         self._save_report_state(state)
+        return "\n\n".join(parts)
 
-    def _start_report_thread(self) -> None:
-        def loop():
-            last_sent = {"11:55": None, "23:55": None}
-            while True:
-                now = datetime.now().astimezone()
-                if now.minute == 0:
-                    self._record_hourly_snapshot(now)
-                current_time = now.strftime("%H:%M")
-                for target in ("11:55", "23:55"):
-                    if current_time == target:
-                        if last_sent[target] != now.date().isoformat():
-                            self._send_scheduled_report(target)
-                            last_sent[target] = now.date().isoformat()
-                time.sleep(30)
-
-        t = threading.Thread(target=loop, daemon=True)
-        t.start()
+    def _next_report_event(self, now: datetime) -> Tuple[datetime, Optional[str]]:
+        """下一次触发的时间及汇报标签；标签为 None 表示整点快照"""
+        next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+        events = [(next_hour, None)]
+        for target in self.REPORT_TIMES:
+            hh, mm = target.split(":")
+            at = now.replace(hour=int(hh), minute=int(mm), second=0, microsecond=0)
+            if at <= now:
+                at += timedelta(days=1)
+            events.append((at, target))
+        return min(events, key=lambda e: e[0])
+
+    async def _report_loop(self) -> None:
+        while True:
+            now = datetime.now().astimezone()
+            at, label = self._next_report_event(now)
+            await asyncio.sleep((at - now).total_seconds())
+            try:
+                # API 调用与文件读写是阻塞的，放到线程里执行，发送回到事件循环
+                if label is None:
+                    await asyncio.to_thread(self._record_hourly_snapshot, at)
+                else:
+                    self._send(await asyncio.to_thread(self._build_scheduled_report, label))
+            except Exception as e:
+                self.logger.error(f"定时汇报失败: {e}")
+
+    async def _post_init(self, app) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._msg_queue = asyncio.Queue(maxsize=self.SEND_QUEUE_SIZE)
+        app.create_task(self._sender_worker())
+        app.create_task(self._report_loop())
 
     def send_traffic_notification(self, result: Dict) -> None:
         t = result['new_threshold']
-        emojis = {10: "💧", 20: "💦", 30: "🌊", 40: "🟢", 50: "🟡", 60: "🟠", 70: "🔶", 80: "🔴", 90: "🚨", 100: "💀"}
-        emoji = emojis.get(t, '📊')
+        emoji = THRESHOLD_EMOJIS.get(t, '📊')
         usage = result['usage_percent']
         traffic = result['traffic']
         limit_tb = self._limit_tb()
         outbound_bytes = traffic.get('outbound_bytes')
-        if outbound_bytes is not None:
-            total_tb = self._bytes_to_tb(outbound_bytes)
-        else:
-            total_tb = (Decimal(traffic['outbound']) / Decimal(1024)).quantize(
-                Decimal("0.001"), rounding=ROUND_HALF_UP
-            )
+        total_tb, _ = self._compute_usage(outbound_bytes, traffic['outbound'])
 
-        bars = int(usage / 10)
-        progress = "█" * bars + "░" * (10 - bars)
+        progress = PROGRESS_BARS[min(max(int(usage / 10), 0), 10)]
 
         msg = (
             f"{emoji} *流量通知 - {t}%*\n\n"
             f"🖥 服务器: *{result['server_name']}*\n"
             f"📊 使用进度:\n"
             f"`{progress}` {usage:.1f}%\n\n"
-            f"💾 已用(出站): *{total_tb} TB* / {limit_tb} TB\n"
-            f"📉 剩余: {(limit_tb - total_tb).quantize(Decimal('0.001'), rounding=ROUND_HALF_UP)} TB\n\n"
+            f"💾 已用(出站): *{total_tb:.3f} TB* / {limit_tb:.3f} TB\n"
+            f"📉 剩余: {limit_tb - total_tb:.3f} TB\n\n"
             f"📥 入站: {traffic['inbound']:.2f} GB\n"
             f"📤 出站: {traffic['outbound']:.2f} GB\n"
             f"📦 出站字节: `{int(outbound_bytes) if outbound_bytes is not None else 'N/A'}`"
@@ -287,7 +539,7 @@ class TelegramBot:
             "🔔 通知间隔: 10%\n\n"
             "使用 /help 查看所有命令"
         )
-        await u.message.reply_text(text, parse_mode='Markdown')
+        await self._md(u, text)
 
     async def cmd_help(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         text = (
@@ -318,33 +570,35 @@ class TelegramBot:
             "/scheduleset delete=23:50,01:00 create=08:00,09:00 - 设置定时\n\n"
             "💡 服务器ID从 /list 获取"
         )
-        await u.message.reply_text(text, parse_mode='Markdown')
+        await self._md(u, text)
 
     async def cmd_list(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
-            servers = self.hetzner.get_servers()
+            servers = await asyncio.to_thread(self._get_servers)
             if not servers:
-                await u.message.reply_text("📭 暂无服务器")
+                await self._reply(u, "📭 暂无服务器")
                 return
 
-            msg = "🖥 *服务器列表*\n\n"
+            parts = ["🖥 *服务器列表*\n\n"]
             for s in servers:
                 status = "🟢 运行中" if s['status'] == 'running' else "🔴 已停止"
                 ip = s['public_net']['ipv4']['ip'] if s['public_net'].get('ipv4') else "N/A"
-                msg += f"{status}\n"
-                msg += f"📛 *{s['name']}*\n"
-                msg += f"🆔 ID: `{s['id']}`\n"
-                msg += f"🌐 IP: `{ip}`\n"
-                msg += f"⚙️ 类型: {s['server_type']['name']}\n"
-                msg += "─────────────\n"
-
-            await u.message.reply_text(msg, parse_mode='Markdown')
+                parts.append(
+                    f"{status}\n"
+                    f"📛 *{s['name']}*\n"
+                    f"🆔 ID: `{s['id']}`\n"
+                    f"🌐 IP: `{ip}`\n"
+                    f"⚙️ 类型: {s['server_type']['name']}\n"
+                    "─────────────\n"
+                )
+
+            await self._md(u, "".join(parts))
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
     async def cmd_status(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
-            servers = self.hetzner.get_servers()
+            servers = await asyncio.to_thread(self._get_servers)
             total = len(servers)
             running = sum(1 for s in servers if s['status'] == 'running')
 
@@ -356,58 +610,45 @@ class TelegramBot:
                 f"🔔 通知间隔: 10%\n"
                 f"✅ 监控系统正常运行"
             )
-            await u.message.reply_text(msg, parse_mode='Markdown')
+            await self._md(u, msg)
         except Exception as e:
-            await u.message.reply_text(f"❌ {e}")
+            await self._reply(u, f"❌ {e}")
 
     async def cmd_traffic(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
             limit_tb = self._limit_tb()
             if not c.args:
-                await u.message.reply_text("⏳ 正在获取全部服务器流量数据...")
-                servers = self.hetzner.get_servers()
+                await self._reply(u, "⏳ 正在获取全部服务器流量数据...")
+                servers = await asyncio.to_thread(self._get_servers)
                 if not servers:
-                    await u.message.reply_text("📭 暂无服务器")
+                    await self._reply(u, "📭 暂无服务器")
                     return
                 parts = ["📊 *流量汇总* (出站计费)\n"]
-                for server in servers:
+                traffics = await asyncio.gather(
+                    *(asyncio.to_thread(self.hetzner.calculate_traffic, s['id'], days=30) for s in servers)
+                )
+                for server, traffic in zip(servers, traffics):
                     sid = server['id']
-                    traffic = self.hetzner.calculate_traffic(sid, days=30)
-                    outbound_bytes = traffic.get('outbound_bytes')
-                    if outbound_bytes is not None:
-                        total_tb = self._bytes_to_tb(outbound_bytes)
-                        usage = float((Decimal(outbound_bytes) / (Decimal(1024) ** 4) / limit_tb) * 100)
-                    else:
-                        total_tb = (Decimal(traffic['outbound']) / Decimal(1024)).quantize(
-                            Decimal("0.001"), rounding=ROUND_HALF_UP
-                        )
-                        usage = float((total_tb / limit_tb) * 100)
+                    total_tb, usage = self._compute_usage(traffic.get('outbound_bytes'), traffic['outbound'])
                     parts.append(
                         f"🖥 *{server['name']}* (`{sid}`)\n"
-                        f"💾 已用(出站): *{total_tb} TB* / {limit_tb} TB\n"
+                        f"💾 已用(出站): *{total_tb:.3f} TB* / {limit_tb:.3f} TB\n"
                         f"📈 使用率: *{usage:.2f}%*"
                     )
-                await u.message.reply_text("\n\n".join(parts), parse_mode='Markdown')
+                await self._md(u, "\n\n".join(parts))
                 return
 
             sid = int(c.args[0])
-            server = self.hetzner.get_server(sid)
+            server = await asyncio.to_thread(self._get_server, sid)
             if not server:
-                await u.message.reply_text("❌ 服务器不存在")
+                await self._reply(u, "❌ 服务器不存在")
                 return
 
-            await u.message.reply_text("⏳ 正在获取流量数据...")
+            await self._reply(u, "⏳ 正在获取流量数据...")
 
-            traffic = self.hetzner.calculate_traffic(sid, days=30)
+            traffic = await asyncio.to_thread(self.hetzner.calculate_traffic, sid, days=30)
             outbound_bytes = traffic.get('outbound_bytes')
-            if outbound_bytes is not None:
-                total_tb = self._bytes_to_tb(outbound_bytes)
-                usage = float((Decimal(outbound_bytes) / (Decimal(1024) ** 4) / limit_tb) * 100)
-            else:
-                total_tb = (Decimal(traffic['outbound']) / Decimal(1024)).quantize(
-                    Decimal("0.001"), rounding=ROUND_HALF_UP
-                )
-                usage = float((total_tb / limit_tb) * 100)
+            total_tb, usage = self._compute_usage(outbound_bytes, traffic['outbound'])
 
             if usage >= 95:
                 emoji = "🚨"
@@ -423,45 +664,47 @@ class TelegramBot:
                 f"🖥 服务器: {server['name']}\n"
                 f"🆔 ID: `{sid}`\n\n"
                 f"{emoji} *本月流量:*\n"
-                f"💾 已用(出站): *{total_tb} TB* / {limit_tb} TB\n"
+                f"💾 已用(出站): *{total_tb:.3f} TB* / {limit_tb:.3f} TB\n"
                 f"📈 使用率: *{usage:.2f}%*\n"
-                f"📉 剩余: *{(limit_tb - total_tb).quantize(Decimal('0.001'), rounding=ROUND_HALF_UP)} TB*\n\n"
+                f"📉 剩余: *{limit_tb - total_tb:.3f} TB*\n\n"
                 f"📥 入站: {traffic['inbound']:.2f} GB\n"
                 f"📤 出站: {traffic['outbound']:.2f} GB\n"
                 f"📦 出站字节: `{int(outbound_bytes) if outbound_bytes is not None else 'N/A'}`"
             )
-            await u.message.reply_text(msg, parse_mode='Markdown')
+            await self._md(u, msg)
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
     async def cmd_today(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
             if not c.args:
-                await u.message.reply_text("⏳ 正在获取全部服务器今日流量...")
-                servers = self.hetzner.get_servers()
+                await self._reply(u, "⏳ 正在获取全部服务器今日流量...")
+                servers = await asyncio.to_thread(self._get_servers)
                 if not servers:
-                    await u.message.reply_text("📭 暂无服务器")
+                    await self._reply(u, "📭 暂无服务器")
                     return
                 parts = ["📅 *今日流量汇总* (出站计费)\n"]
-                for server in servers:
+                todays = await asyncio.gather(
+                    *(asyncio.to_thread(self.hetzner.get_today_traffic, s['id']) for s in servers)
+                )
+                for server, today in zip(servers, todays):
                     sid = server['id']
-                    today = self.hetzner.get_today_traffic(sid)
-                    outbound_tb = Decimal(today['outbound']) / Decimal(1024)
+                    outbound_tb = today['outbound'] / GB_PER_TB
                     parts.append(
                         f"🖥 *{server['name']}* (`{sid}`)\n"
-                        f"📤 出站: *{outbound_tb.quantize(Decimal('0.001'), rounding=ROUND_HALF_UP)} TB*\n"
+                        f"📤 出站: *{outbound_tb:.3f} TB*\n"
                         f"📥 入站: {today['inbound']:.2f} GB"
                     )
-                await u.message.reply_text("\n\n".join(parts), parse_mode='Markdown')
+                await self._md(u, "\n\n".join(parts))
                 return
 
             sid = int(c.args[0])
-            server = self.hetzner.get_server(sid)
+            server = await asyncio.to_thread(self._get_server, sid)
             if not server:
-                await u.message.reply_text("❌ 服务器不存在")
+                await self._reply(u, "❌ 服务器不存在")
                 return
 
-            today = self.hetzner.get_today_traffic(sid)
+            today = await asyncio.to_thread(self.hetzner.get_today_traffic, sid)
 
             msg = (
                 f"📅 *今日流量分析*\n\n"
@@ -471,195 +714,215 @@ class TelegramBot:
                 f"📥 入站: {today['inbound']:.2f} GB\n"
                 f"📤 出站: {today['outbound']:.2f} GB"
             )
-            await u.message.reply_text(msg, parse_mode='Markdown')
+            await self._md(u, msg)
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
     async def cmd_report(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
-            self._send_scheduled_report("manual")
+            self._send(await asyncio.to_thread(self._build_scheduled_report, "manual"))
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
     async def cmd_reportstatus(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
             state = self._load_report_state()
             last_time = state.get("last_time")
             if last_time:
-                await u.message.reply_text(f"📋 上次汇报时间: *{last_time}*", parse_mode='Markdown')
+                await self._md(u, f"📋 上次汇报时间: *{last_time}*")
             else:
-                await u.message.reply_text("📋 暂无历史汇报记录")
+                await self._reply(u, "📋 暂无历史汇报记录")
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
     async def cmd_reportreset(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
             self._save_report_state({})
-            await u.message.reply_text("♻️ 汇报区间已重置")
+            await self._reply(u, "♻️ 汇报区间已重置")
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
     async def cmd_dnstest(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
             cf_cfg = self.config.get('cloudflare', {})
             record_map = cf_cfg.get('record_map', {})
-            servers = self.hetzner.get_servers()
+            servers = await asyncio.to_thread(self._get_servers)
             if not servers:
-                await u.message.reply_text("📭 暂无服务器")
+                await self._reply(u, "📭 暂无服务器")
                 return
             target_servers = servers
             if c.args:
                 sid = int(c.args[0])
                 target_servers = [s for s in servers if s['id'] == sid]
                 if not target_servers:
-                    await u.message.reply_text("❌ 服务器不存在")
+                    await self._reply(u, "❌ 服务器不存在")
                     return
+            lines = []
+            targets = []
             for server in target_servers:
                 sid = server['id']
                 record_name = record_map.get(str(sid))
                 if not record_name:
-                    await u.message.reply_text(f"⚠️ 未配置DNS映射: {sid}")
+                    lines.append(f"⚠️ 未配置DNS映射: {sid}")
                     continue
                 ip = server['public_net']['ipv4']['ip'] if server['public_net'].get('ipv4') else None
                 if not ip:
-                    await u.message.reply_text(f"❌ 获取IP失败: {sid}")
+                    lines.append(f"❌ 获取IP失败: {sid}")
                     continue
-                res = self.hetzner.update_cloudflare_a_record(
+                targets.append((record_name, ip))
+            results = await asyncio.gather(*(
+                asyncio.to_thread(
+                    self.hetzner.update_cloudflare_a_record,
                     cf_cfg.get('api_token', ''),
                     cf_cfg.get('zone_id', ''),
                     record_name,
                     ip,
                 )
+                for record_name, ip in targets
+            ))
+            for (record_name, ip), res in zip(targets, results):
                 if res.get('success'):
-                    await u.message.reply_text(f"✅ DNS已更新: {record_name} -> {ip}")
+                    lines.append(f"✅ DNS已更新: {record_name} -> {ip}")
                 else:
-                    await u.message.reply_text(f"❌ DNS更新失败: {record_name} ({res.get('error')})")
+                    lines.append(f"❌ DNS更新失败: {record_name} ({res.get('error')})")
+            await self._reply_lines(u, lines)
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
-    def _resolve_a(self, hostname: str, timeout: int = 5) -> str:
-        prev_timeout = socket.getdefaulttimeout()
-        socket.setdefaulttimeout(timeout)
-        try:
-            return socket.gethostbyname(hostname)
-        finally:
-            socket.setdefaulttimeout(prev_timeout)
+    async def _resolve_a(self, hostname: str, timeout: int = 5) -> str:
+        loop = asyncio.get_running_loop()
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(hostname, None, family=socket.AF_INET, type=socket.SOCK_STREAM),
+            timeout,
+        )
+        return infos[0][4][0]
 
     async def cmd_dnscheck(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
             cf_cfg = self.config.get('cloudflare', {})
             record_map = cf_cfg.get('record_map', {})
-            servers = self.hetzner.get_servers()
+            servers = await asyncio.to_thread(self._get_servers)
             if not servers:
-                await u.message.reply_text("📭 暂无服务器")
+                await self._reply(u, "📭 暂无服务器")
                 return
-            await u.message.reply_text("⏳ 正在检查DNS解析...")
+            await self._reply(u, "⏳ 正在检查DNS解析...")
             target_servers = servers
             if c.args:
                 sid = int(c.args[0])
                 target_servers = [s for s in servers if s['id'] == sid]
                 if not target_servers:
-                    await u.message.reply_text("❌ 服务器不存在")
+                    await self._reply(u, "❌ 服务器不存在")
                     return
+            lines = []
+            targets = []
             for server in target_servers:
                 sid = server['id']
                 record_name = record_map.get(str(sid))
                 if not record_name:
-                    await u.message.reply_text(f"⚠️ 未配置DNS映射: {sid}")
+                    lines.append(f"⚠️ 未配置DNS映射: {sid}")
                     continue
                 ip = server['public_net']['ipv4']['ip'] if server['public_net'].get('ipv4') else None
                 if not ip:
-                    await u.message.reply_text(f"❌ 获取IP失败: {sid}")
-                    continue
-                try:
-                    resolved = self._resolve_a(record_name)
-                except Exception as e:
-                    await u.message.reply_text(f"❌ DNS解析失败: {record_name} ({e})")
+                    lines.append(f"❌ 获取IP失败: {sid}")
                     continue
-                if resolved == ip:
-                    await u.message.reply_text(f"✅ DNS解析正常: {record_name} -> {resolved}")
+                targets.append((record_name, ip))
+            results = await asyncio.gather(
+                *(self._resolve_a(record_name) for record_name, _ in targets),
+                return_exceptions=True,
+            )
+            for (record_name, ip), resolved in zip(targets, results):
+                if isinstance(resolved, Exception):
+                    lines.append(f"❌ DNS解析失败: {record_name} ({resolved})")
+                elif resolved == ip:
+                    lines.append(f"✅ DNS解析正常: {record_name} -> {resolved}")
                 else:
-                    await u.message.reply_text(f"⚠️ DNS解析不一致: {record_name} -> {resolved} (期望 {ip})")
+                    lines.append(f"⚠️ DNS解析不一致: {record_name} -> {resolved} (期望 {ip})")
+            await self._reply_lines(u, lines)
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
     async def cmd_startserver(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         if not c.args:
-            await u.message.reply_text("📝 用法: /startserver <ID>", parse_mode='Markdown')
+            await self._md(u, "📝 用法: /startserver <ID>")
             return
 
         try:
             sid = int(c.args[0])
-            server = self.hetzner.get_server(sid)
+            server = await asyncio.to_thread(self._get_server, sid)
             if not server:
-                await u.message.reply_text("❌ 服务器不存在")
+                await self._reply(u, "❌ 服务器不存在")
                 return
 
-            if self.hetzner.poweron_server(sid):
-                await u.message.reply_text(f"✅ *{server['name']}* 已启动", parse_mode='Markdown')
+            started = await asyncio.to_thread(self.hetzner.poweron_server, sid)
+            self._invalidate_servers_cache()
+            if started:
+                await self._md(u, f"✅ *{server['name']}* 已启动")
             else:
-                await u.message.reply_text("❌ 启动失败")
+                await self._reply(u, "❌ 启动失败")
         except Exception as e:
-            await u.message.reply_text(f"❌ {e}")
+            await self._reply(u, f"❌ {e}")
 
     async def cmd_stopserver(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         if not c.args:
-            await u.message.reply_text("📝 用法: /stopserver <ID>", parse_mode='Markdown')
+            await self._md(u, "📝 用法: /stopserver <ID>")
             return
 
         try:
             sid = int(c.args[0])
-            if self.hetzner.shutdown_server(sid):
-                await u.message.reply_text("✅ 服务器已停止", parse_mode='Markdown')
+            stopped = await asyncio.to_thread(self.hetzner.shutdown_server, sid)
+            self._invalidate_servers_cache()
+            if stopped:
+                await self._md(u, "✅ 服务器已停止")
             else:
-                await u.message.reply_text("❌ 停止失败")
+                await self._reply(u, "❌ 停止失败")
         except Exception as e:
-            await u.message.reply_text(f"❌ {e}")
+            await self._reply(u, f"❌ {e}")
 
     async def cmd_reboot(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         if not c.args:
-            await u.message.reply_text("📝 用法: /reboot <ID>", parse_mode='Markdown')
+            await self._md(u, "📝 用法: /reboot <ID>")
             return
 
         try:
             sid = int(c.args[0])
-            if self.hetzner.reboot_server(sid):
-                await u.message.reply_text("✅ 服务器已重启", parse_mode='Markdown')
+            rebooted = await asyncio.to_thread(self.hetzner.reboot_server, sid)
+            self._invalidate_servers_cache()
+            if rebooted:
+                await self._md(u, "✅ 服务器已重启")
             else:
-                await u.message.reply_text("❌ 重启失败")
+                await self._reply(u, "❌ 重启失败")
         except Exception as e:
-            await u.message.reply_text(f"❌ {e}")
+            await self._reply(u, f"❌ {e}")
 
     async def cmd_delete(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         if len(c.args) < 2 or c.args[1] != 'confirm':
-            await u.message.reply_text(
-                "⚠️ 用法: /delete <ID> confirm\n\n❗️ 此操作不可撤销！",
-                parse_mode='Markdown'
-            )
+            await self._md(u, "⚠️ 用法: /delete <ID> confirm\n\n❗️ 此操作不可撤销！")
             return
 
         try:
             sid = int(c.args[0])
-            if self.hetzner.delete_server(sid):
-                await u.message.reply_text(f"✅ 服务器 {sid} 已删除", parse_mode='Markdown')
+            deleted = await asyncio.to_thread(self.hetzner.delete_server, sid)
+            self._invalidate_servers_cache()
+            if deleted:
+                await self._md(u, f"✅ 服务器 {sid} 已删除")
             else:
-                await u.message.reply_text("❌ 删除失败")
+                await self._reply(u, "❌ 删除失败")
         except Exception as e:
-            await u.message.reply_text(f"❌ {e}")
+            await self._reply(u, f"❌ {e}")
 
     async def cmd_rebuild(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         if not c.args:
-            await u.message.reply_text("📝 用法: /rebuild <服务器ID>", parse_mode='Markdown')
+            await self._md(u, "📝 用法: /rebuild <服务器ID>")
             return
 
         try:
             sid = int(c.args[0])
-            server = self.hetzner.get_server(sid)
+            server = await asyncio.to_thread(self._get_server, sid)
             if not server:
-                await u.message.reply_text("❌ 服务器不存在")
+                await self._reply(u, "❌ 服务器不存在")
                 return
 
-            await u.message.reply_text(f"🔨 开始重建 *{server['name']}*...", parse_mode='Markdown')
+            await self._md(u, f"🔨 开始重建 *{server['name']}*...")
 
             template = self.config.get('server_template', {})
             server_type = template.get('server_type')
@@ -671,7 +934,8 @@ class TelegramBot:
             override_snapshot_id = snapshot_map.get(sid)
 
             if override_snapshot_id:
-                result = self.hetzner.delete_and_recreate_from_snapshot_id(
+                result = await asyncio.to_thread(
+                    self.hetzner.delete_and_recreate_from_snapshot_id,
                     server_id=sid,
                     snapshot_id=override_snapshot_id,
                     server_type=server_type,
@@ -681,7 +945,8 @@ class TelegramBot:
                     use_original_name=use_original_name,
                 )
             else:
-                result = self.hetzner.delete_and_recreate_from_snapshot(
+                result = await asyncio.to_thread(
+                    self.hetzner.delete_and_recreate_from_snapshot,
                     server_id=sid,
                     server_type=server_type,
                     location=location,
@@ -689,111 +954,157 @@ class TelegramBot:
                     name_prefix=name_prefix,
                     use_original_name=use_original_name,
                 )
+            self._invalidate_servers_cache()
 
             if result.get('success'):
-                self.monitor.reset_server_thresholds(sid)
-                self.monitor.handle_rebuild_success(sid, result)
+                new_id = result.get('new_server_id')
+                if isinstance(new_id, int):
+                    self._remap_server_config(sid, new_id)
+                await asyncio.to_thread(self.monitor.reset_server_thresholds, sid)
+                # 配置映射已在上面更新，工作线程只处理阈值状态和 DNS
+                await asyncio.to_thread(self.monitor.handle_rebuild_success, sid, result, False)
                 msg = (
                     f"✅ *重建成功！*\n\n"
                     f"🆔 新ID: `{result.get('new_server_id')}`\n"
                     f"🌐 新IP: `{result.get('new_ip')}`\n\n"
                     f"💡 流量已重置"
                 )
-                await u.message.reply_text(msg, parse_mode='Markdown')
+                await self._md(u, msg)
             else:
-                await u.message.reply_text(f"❌ 重建失败: {result.get('error')}", parse_mode='Markdown')
+                await self._md(u, f"❌ 重建失败: {result.get('error')}")
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
 
     async def cmd_snapshots(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         try:
-            snapshots = self.hetzner.get_snapshots()
+            snapshots = await asyncio.to_thread(self.hetzner.get_snapshots)
             if not snapshots:
-                await u.message.reply_text("📭 暂无快照")
+                await self._reply(u, "📭 暂无快照")
                 return
 
-            msg = "📦 *快照列表*\n\n"
+            parts = ["📦 *快照列表*\n\n"]
             for idx, snap in enumerate(snapshots[:5], 1):
-                msg += f"{idx}. 📸 {snap.get('description', snap.get('name', ''))}\n"
-                msg += f"   🆔 ID: `{snap.get('id')}`\n\n"
+                parts.append(
+                    f"{idx}. 📸 {snap.get('description', snap.get('name', ''))}\n"
+                    f"   🆔 ID: `{snap.get('id')}`\n\n"
+                )
 
-            await u.message.reply_text(msg, parse_mode='Markdown')
+            await self._md(u, "".join(parts))
         except Exception as e:
-            await u.message.reply_text(f"❌ {e}")
+            await self._reply(u, f"❌ {e}")
 
     async def cmd_createsnapshot(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         if not c.args:
-            await u.message.reply_text("📝 用法: /createsnapshot <ID>", parse_mode='Markdown')
+            await self._md(u, "📝 用法: /createsnapshot <ID>")
             return
 
         try:
             sid = int(c.args[0])
-            await u.message.reply_text("📸 正在创建快照...")
+            await self._reply(u, "📸 正在创建快照...")
 
-            snapshot = self.hetzner.create_snapshot(sid)
+            snapshot = await asyncio.to_thread(self.hetzner.create_snapshot, sid)
             if snapshot:
-                await u.message.reply_text(
-                    f"✅ 快照创建成功！\n🆔 ID: `{snapshot.get('id')}`",
-                    parse_mode='Markdown'
-                )
+                await self._md(u, f"✅ 快照创建成功！\n🆔 ID: `{snapshot.get('id')}`")
             else:
-                await u.message.reply_text("❌ 快照创建失败")
+                await self._reply(u, "❌ 快照创建失败")
         except Exception as e:
-            await u.message.reply_text(f"❌ {e}")
+            await self._reply(u, f"❌ {e}")
 
     async def cmd_scheduleon(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
-        self.scheduler.enable()
+        self.scheduler.enable(save=False)
+        self._save_config_soon()
         self.scheduler.load_tasks()
-        await u.message.reply_text("✅ 定时任务已启用", parse_mode='Markdown')
+        self._sched_status_cache = None
+        await self._md(u, "✅ 定时任务已启用")
 
     async def cmd_scheduleoff(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
-        self.scheduler.disable()
+        self.scheduler.disable(save=False)
+        self._save_config_soon()
         self.scheduler.load_tasks()
-        await u.message.reply_text("⏸ 定时任务已关闭", parse_mode='Markdown')
+        self._sched_status_cache = None
+        await self._md(u, "⏸ 定时任务已关闭")
 
     async def cmd_schedulestatus(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
+        cached = self._sched_status_cache
+        if cached and time.monotonic() - cached[0] < self.SCHED_STATUS_TTL:
+            await self._md(u, cached[1])
+            return
         enabled = self.config.get('scheduler', {}).get('enabled')
         emoji = "✅" if enabled else "⏸"
         text = "已启用" if enabled else "已禁用"
         next_run = self.scheduler.get_next_run()
         tasks = self.config.get('scheduler', {}).get('tasks', [])
-        lines = [f"📋 *定时任务状态*\n\n{emoji} 状态: *{text}*"]
-        if tasks:
-            for task in tasks:
-                action = task.get('action')
-                times = ",".join(task.get('times', []))
-                lines.append(f"{action}: {times}")
-        lines.append(f"下次执行: {next_run}")
-        msg = "\n".join(lines)
-        await u.message.reply_text(msg, parse_mode='Markdown')
+        body = "".join(f"{t.get('action')}: {','.join(t.get('times', []))}\n" for t in tasks)
+        msg = f"📋 *定时任务状态*\n\n{emoji} 状态: *{text}*\n{body}下次执行: {next_run}"
+        self._sched_status_cache = (time.monotonic(), msg)
+        await self._md(u, msg)
 
     async def cmd_scheduleset(self, u: Update, c: ContextTypes.DEFAULT_TYPE):
         if not c.args:
-            await u.message.reply_text("用法: /scheduleset delete=23:50,01:00 create=08:00,09:00")
+            await self._reply(u, "用法: /scheduleset delete=23:50,01:00 create=08:00,09:00")
             return
         try:
             delete_times = []
             create_times = []
             for part in c.args:
-                if part.startswith("delete="):
-                    delete_times = [t for t in part.split("=", 1)[1].split(",") if t]
-                elif part.startswith("create="):
-                    create_times = [t for t in part.split("=", 1)[1].split(",") if t]
+                key, sep, value = part.partition("=")
+                if not sep or key not in ("delete", "create"):
+                    continue
+                times = [t for t in value.split(",") if t]
+                invalid = [t for t in times if not HHMM_RE.match(t)]
+                if invalid:
+                    await self._reply(u, f"❌ 无效时间: {', '.join(invalid)}")
+                    return
+                if key == "delete":
+                    delete_times = times
+                else:
+                    create_times = times
             tasks = []
             if delete_times:
                 tasks.append({"action": "delete_all", "times": delete_times})
             if create_times:
                 tasks.append({"action": "create_from_snapshots", "times": create_times})
             if not tasks:
-                await u.message.reply_text("未识别到时间，格式: delete=23:50,01:00 create=08:00,09:00")
+                await self._reply(u, "未识别到时间，格式: delete=23:50,01:00 create=08:00,09:00")
                 return
-            self.config.setdefault('scheduler', {})['tasks'] = tasks
-            self._save_config()
+            scheduler_cfg = self.config.setdefault('scheduler', {})
+            old_pairs = self.scheduler.task_pairs(scheduler_cfg.get('tasks', []))
+            new_pairs = self.scheduler.task_pairs(tasks)
+            scheduler_cfg['tasks'] = tasks
+            self._sched_status_cache = None
+            self._save_config_soon()
             if self.scheduler.is_enabled():
-                self.scheduler.load_tasks()
-            await u.message.reply_text("✅ 定时任务时间已更新", parse_mode='Markdown')
+                # 只增删变化的任务，其余任务保持原样
+                self.scheduler.remove_tasks(old_pairs - new_pairs)
+                self.scheduler.add_tasks(new_pairs - old_pairs)
+            await self._md(u, "✅ 定时任务时间已更新")
         except Exception as e:
-            await u.message.reply_text(f"❌ 错误: {e}")
+            await self._reply(u, f"❌ 错误: {e}")
+
+    async def _on_error(self, u: object, c: ContextTypes.DEFAULT_TYPE):
+        self.logger.error(f"处理更新失败: {c.error}", exc_info=c.error)
+
+    def _chat_queued(self, handler):
+        """命令按会话排队：同一会话内按顺序执行，不同会话互不阻塞；
+        处理函数入队后立即返回，慢命令不占用并发更新名额"""
+        async def wrapper(u: Update, c: ContextTypes.DEFAULT_TYPE):
+            chat_id = u.effective_chat.id
+            queue = self._chat_queues.get(chat_id)
+            if queue is None:
+                queue = self._chat_queues[chat_id] = asyncio.Queue()
+                self._chat_workers[chat_id] = asyncio.create_task(self._drain_chat(queue))
+            await queue.put((handler, u, c))
+        return wrapper
+
+    async def _drain_chat(self, queue: asyncio.Queue) -> None:
+        while True:
+            handler, u, c = await queue.get()
+            try:
+                await handler(u, c)
+            except Exception as e:
+                self.logger.error(f"处理更新失败: {e}", exc_info=True)
+            finally:
+                queue.task_done()
 
     def initialize_commands(self) -> bool:
         if not self.enabled:
@@ -802,40 +1113,66 @@ class TelegramBot:
 
         try:
             self.logger.info("初始化 Application...")
-            self.app = Application.builder().token(self.bot_token).build()
+            self.app = (
+                Application.builder()
+                .token(self.bot_token)
+                .concurrent_updates(self.CONCURRENT_UPDATES)
+                .post_init(self._post_init)
+                .build()
+            )
 
             self.logger.info("注册命令...")
-            self.app.add_handler(CommandHandler("start", self.cmd_start))
-            self.app.add_handler(CommandHandler("help", self.cmd_help))
-            self.app.add_handler(CommandHandler("list", self.cmd_list))
-            self.app.add_handler(CommandHandler("status", self.cmd_status))
-            self.app.add_handler(CommandHandler("traffic", self.cmd_traffic))
-            self.app.add_handler(CommandHandler("today", self.cmd_today))
-            self.app.add_handler(CommandHandler("report", self.cmd_report))
-            self.app.add_handler(CommandHandler("reportstatus", self.cmd_reportstatus))
-            self.app.add_handler(CommandHandler("reportreset", self.cmd_reportreset))
-            self.app.add_handler(CommandHandler("dnstest", self.cmd_dnstest))
-            self.app.add_handler(CommandHandler("dnscheck", self.cmd_dnscheck))
-            self.app.add_handler(CommandHandler("startserver", self.cmd_startserver))
-            self.app.add_handler(CommandHandler("stopserver", self.cmd_stopserver))
-            self.app.add_handler(CommandHandler("reboot", self.cmd_reboot))
-            self.app.add_handler(CommandHandler("delete", self.cmd_delete))
-            self.app.add_handler(CommandHandler("rebuild", self.cmd_rebuild))
-            self.app.add_handler(CommandHandler("snapshots", self.cmd_snapshots))
-            self.app.add_handler(CommandHandler("createsnapshot", self.cmd_createsnapshot))
-            self.app.add_handler(CommandHandler("scheduleon", self.cmd_scheduleon))
-            self.app.add_handler(CommandHandler("scheduleoff", self.cmd_scheduleoff))
-            self.app.add_handler(CommandHandler("schedulestatus", self.cmd_schedulestatus))
-            self.app.add_handler(CommandHandler("scheduleset", self.cmd_scheduleset))
+            add = self.app.add_handler
+            queued = self._chat_queued
+            for name in self.COMMANDS:
+                add(CommandHandler(name, queued(getattr(self, f"cmd_{name}"))))
+            self.app.add_error_handler(self._on_error)
 
             self.logger.info("✅ 命令已注册")
-            self._start_report_thread()
             return True
 
         except Exception as e:
             self.logger.error(f"初始化失败: {e}", exc_info=True)
             return False
 
+    def run(self) -> None:
+        """配置了 webhook.url 时以 Webhook 模式运行，否则长轮询"""
+        if self.webhook.get('enabled') and self.webhook.get('url'):
+            self.run_webhook(
+                listen=self.webhook.get('listen', '0.0.0.0'),
+                port=int(self.webhook.get('port', 8443)),
+                url_path=self.webhook.get('url_path', 'telegram'),
+                secret_token=self.webhook.get('secret_token') or None,
+                webhook_url=self.webhook['url'],
+            )
+        else:
+            self.run_polling()
+
+    def run_webhook(
+        self,
+        listen: str,
+        port: int,
+        url_path: str,
+        secret_token: Optional[str] = None,
+        webhook_url: Optional[str] = None,
+    ) -> None:
+        if not self.app:
+            self.logger.error("Application 未初始化")
+            return
+
+        try:
+            self.logger.info(f"启动 Webhook: {listen}:{port}/{url_path}")
+            self.app.run_webhook(
+                listen=listen,
+                port=port,
+                url_path=url_path,
+                secret_token=secret_token,
+                webhook_url=webhook_url,
+                stop_signals=None,
+            )
+        except Exception as e:
+            self.logger.error(f"运行失败: {e}", exc_info=True)
+
     def run_polling(self) -> None:
         if not self.app:
             self.logger.error("Application 未初始化")
@@ -1,12 +1,22 @@
 import json
 import logging
+import os
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 import yaml
 from hetzner_manager import HetznerManager
 
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 
 class TrafficMonitor:
+    # 并发查询流量的线程数上限，兼顾 Hetzner API 限速
+    MAX_WORKERS = 20
+
     def __init__(self, hetzner: HetznerManager, config: Dict, telegram_bot: Optional[object] = None):
         self.hetzner = hetzner
         self.config = config
@@ -16,9 +26,11 @@ class TrafficMonitor:
         self.traffic_limit = config['traffic']['limit_gb']
         self.exceed_action = config['traffic']['exceed_action']
         self.warning_thresholds = config['traffic']['warning_thresholds']
+        self._sorted_thresholds = sorted(self.warning_thresholds)
         self.whitelist_ids = config['whitelist']['server_ids']
         self.whitelist_names = config['whitelist']['server_names']
         self._threshold_state_path = Path("/opt/hetzner-monitor/threshold_state.json")
+        self._threshold_lock = threading.Lock()
 
     def set_telegram_bot(self, telegram_bot: Optional[object]):
         self.telegram_bot = telegram_bot
@@ -32,23 +44,28 @@ class TrafficMonitor:
             return {}
 
     def _save_threshold_state(self, state: Dict[str, int]) -> None:
+        # 写入临时文件后原子替换，避免并发读取到半截 JSON 而误判为空状态
+        tmp_path = self._threshold_state_path.with_name(self._threshold_state_path.name + ".tmp")
         try:
-            self._threshold_state_path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+            tmp_path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self._threshold_state_path)
         except Exception as e:
             self.logger.error(f"保存阈值状态失败: {e}")
 
     def reset_server_thresholds(self, server_id: int) -> None:
-        state = self._load_threshold_state()
-        state[str(server_id)] = 0
-        self._save_threshold_state(state)
+        with self._threshold_lock:
+            state = self._load_threshold_state()
+            state[str(server_id)] = 0
+            self._save_threshold_state(state)
 
     def _update_threshold_on_rebuild(self, old_id: int, new_id: Optional[int]) -> None:
-        state = self._load_threshold_state()
-        if str(old_id) in state:
-            state.pop(str(old_id), None)
-        if new_id is not None:
-            state[str(new_id)] = 0
-        self._save_threshold_state(state)
+        with self._threshold_lock:
+            state = self._load_threshold_state()
+            if str(old_id) in state:
+                state.pop(str(old_id), None)
+            if new_id is not None:
+                state[str(new_id)] = 0
+            self._save_threshold_state(state)
 
     def _config_path(self) -> str:
         return self.config.get('_config_path', 'config.yaml')
@@ -57,7 +74,7 @@ class TrafficMonitor:
         path = self._config_path()
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f) or {}
+                data = yaml.load(f, Loader=YamlLoader) or {}
         except Exception as e:
             self.logger.error(f"读取配置失败: {e}")
             return
@@ -84,7 +101,7 @@ class TrafficMonitor:
 
         try:
             with open(path, 'w', encoding='utf-8') as f:
-                yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+                yaml.dump(data, f, Dumper=YamlDumper, sort_keys=False, allow_unicode=True)
             # Keep in-memory config aligned.
             self.config.update(data)
         except Exception as e:
@@ -114,10 +131,10 @@ class TrafficMonitor:
                 except Exception:
                     pass
 
-    def handle_rebuild_success(self, old_id: int, result: Dict) -> None:
+    def handle_rebuild_success(self, old_id: int, result: Dict, update_config: bool = True) -> None:
         new_id = result.get('new_server_id')
         new_ip = result.get('new_ip')
-        if isinstance(new_id, int):
+        if update_config and isinstance(new_id, int):
             self._update_config_mapping(old_id, new_id)
         self._update_threshold_on_rebuild(old_id, new_id if isinstance(new_id, int) else None)
         self._update_dns_after_rebuild(old_id, new_ip)
@@ -142,19 +159,18 @@ class TrafficMonitor:
             total_traffic = traffic['total']
             usage_percent = (total_traffic / self.traffic_limit) * 100
         
-        state = self._load_threshold_state()
-        last_threshold = int(state.get(str(server_id), 0))
-        thresholds = sorted(self.warning_thresholds)
-        current_threshold = 0
-        for threshold in thresholds:
-            if usage_percent >= threshold:
-                current_threshold = threshold
+        thresholds = self._sorted_thresholds
+        idx = bisect_right(thresholds, usage_percent)
+        current_threshold = thresholds[idx - 1] if idx else 0
 
         new_threshold = None
-        if current_threshold > last_threshold:
-            new_threshold = current_threshold
-            state[str(server_id)] = current_threshold
-            self._save_threshold_state(state)
+        with self._threshold_lock:
+            state = self._load_threshold_state()
+            last_threshold = int(state.get(str(server_id), 0))
+            if current_threshold > last_threshold:
+                new_threshold = current_threshold
+                state[str(server_id)] = current_threshold
+                self._save_threshold_state(state)
 
         result = {
             'server_id': server_id,
@@ -168,7 +184,7 @@ class TrafficMonitor:
             'new_threshold': new_threshold,
         }
         
-        for threshold in sorted(self.warning_thresholds):
+        for threshold in thresholds:
             if usage_percent >= threshold and usage_percent < threshold + 5:
                 result['warnings'].append(threshold)
         
@@ -178,18 +194,23 @@ class TrafficMonitor:
         
         return result
     
+    def _check_server_safe(self, server: Dict) -> Optional[Dict]:
+        try:
+            return self.check_server_traffic(server)
+        except Exception as e:
+            self.logger.error(f"检查服务器 {server['name']} 流量时出错: {e}")
+            return None
+
     def check_all_servers(self) -> List[Dict]:
         servers = self.hetzner.get_servers()
-        results = []
-        
-        for server in servers:
-            try:
-                result = self.check_server_traffic(server)
-                results.append(result)
-            except Exception as e:
-                self.logger.error(f"检查服务器 {server['name']} 流量时出错: {e}")
-        
-        return results
+        if not servers:
+            return []
+
+        # 每台服务器需要两次 API 调用，并发执行以免总耗时随服务器数量线性增长
+        workers = min(self.MAX_WORKERS, len(servers))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self._check_server_safe, servers))
+        return [r for r in results if r is not None]
     
     def handle_exceeded_server(self, result: Dict) -> bool:
         server_id = result['server_id']
@@ -1,49 +1,143 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import bisect
+import copy
+import hmac
 import json
 import os
 import socket
 import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse as _StarletteJSONResponse
 from fastapi.staticfiles import StaticFiles
 
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+
+    class _StrFallbackORJSONResponse(ORJSONResponse):
+        # Anything orjson can't encode natively (e.g. Decimal) is sent as its string form.
+        def render(self, content: Any) -> bytes:
+            return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    JSONResponse = _StrFallbackORJSONResponse
+except ImportError:
+    orjson = None
+    JSONResponse = _StarletteJSONResponse
+
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(APP_ROOT, "static")
 
 CONFIG_PATH = os.environ.get("HETZNER_CONFIG_PATH", "/app/config.yaml")
 WEB_CONFIG_PATH = os.environ.get("WEB_CONFIG_PATH", "/app/web_config.json")
 REPORT_STATE_PATH = os.environ.get("REPORT_STATE_PATH", "/app/report_state.json")
+DAILY_REPORT_RECHECK_SECONDS = 600
+SERVER_LIST_TTL = 60
 
 ALERT_STATE: Dict[str, Dict[str, Optional[float]]] = {}
 REBUILD_LOCKS: Dict[str, threading.Lock] = {}
 SCHEDULE_STATE: Dict[str, Any] = {"last_daily_report": None, "last_task_runs": {}}
 BOT_STATE: Dict[str, Any] = {"update_offset": 0, "last_message_id": None, "last_message_text": None}
 
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Keep-alive pools so each API call doesn't pay a fresh TCP/TLS handshake.
+_HETZNER_CLIENTS: Dict[str, "HetznerClient"] = {}
+_HETZNER_CLIENTS_LOCK = threading.Lock()
+# Shared by every per-server fan-out; tasks must not submit back into it.
+_FANOUT_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hetzner-fanout")
+_TG_SESSION = _build_session()
+_CF_SESSION = _build_session()
+# token -> (monotonic fetch time, server list); the list is shared, so don't mutate it.
+_SERVER_LIST_CACHE: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+_TG_ALLOWED_UPDATES = json.dumps(["message", "callback_query"])
+# path -> (st_mtime_ns, st_size, parsed data); files are only re-parsed after they change on disk.
+_FILE_CACHE: Dict[str, tuple] = {}
+# tag -> {(prev_key, curr_key): delta}; the few most recently used tags are kept.
+_DELTA_CACHE: Dict[Any, Dict[Tuple[str, str], Dict[str, Dict[str, Any]]]] = {}
+_DELTA_CACHE_TAGS = 4
+# Per-tag results derived from the hourly history, under the same tags as _DELTA_CACHE:
+# (tag, tracking start) -> tracking totals, (tag, name map) -> last rebuilds, (tag,) -> sorted keys.
+_TRACKING_CACHE: Dict[Any, Dict[str, Optional[str]]] = {}
+_HOUR_KEYS_CACHE: Dict[Any, List[str]] = {}
+_REBUILD_CACHE: Dict[Any, Dict[str, str]] = {}
+_DELTA_CACHE_LOCK = threading.Lock()
+
+
+def _cached_load_versioned(path: str, parse, private: bool = True) -> Tuple[Any, tuple]:
+    """Like _cached_load, also returning the (mtime_ns, size) stamp the data was parsed from.
+
+    With private=False the cached object itself is returned and must be treated as read-only.
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _FILE_CACHE.get(path)
+    if cached and cached[:2] == stamp:
+        data = cached[2]
+    else:
+        with open(path, "rb") as f:
+            data = parse(f.read())
+        _FILE_CACHE[path] = (*stamp, data)
+    # Config callers mutate and save what they load, so they get their own copy.
+    return (copy.deepcopy(data) if private else data), stamp
+
+
+def _cached_load(path: str, parse) -> Any:
+    return _cached_load_versioned(path, parse)[0]
+
 
 def _load_yaml(path: str) -> Dict[str, Any]:
-    with open(path, "r") as f:
-        return yaml.safe_load(f) or {}
+    return _cached_load(path, lambda raw: yaml.load(raw, Loader=YamlLoader) or {})
 
 
 def _save_yaml(path: str, data: Dict[str, Any]) -> None:
     with open(path, "w") as f:
-        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=False)
+        yaml.dump(data, f, Dumper=YamlDumper, sort_keys=False, allow_unicode=False)
+
+
+def _json_loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def _json_dumps(data: Any) -> bytes:
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data).encode("utf-8")
 
 
 def _load_json(path: str) -> Dict[str, Any]:
+    return _load_json_versioned(path)[0]
+
+
+def _load_json_versioned(path: str) -> Tuple[Dict[str, Any], Optional[tuple]]:
+    # Shared, read-only view for the API handlers; loops that modify the report state
+    # go through _load_report_state instead.
     if not os.path.exists(path):
-        return {}
-    with open(path, "r") as f:
-        return json.load(f)
+        return {}, None
+    return _cached_load_versioned(path, _json_loads, private=False)
 
 
 def _now_local() -> datetime:
@@ -75,10 +169,25 @@ def _quantize_tb(value: Decimal) -> Decimal:
     return value.quantize(Decimal("0.001"), rounding=ROUND_HALF_UP)
 
 
+_TB = 1024 ** 4
+
+
+def _bytes_to_millitb(value_bytes: float) -> int:
+    # Integer milli-TB, rounded half up; same result as _bytes_to_tb without Decimal.
+    return (int(value_bytes) * 1000 + _TB // 2) // _TB
+
+
+def _format_millitb(value: int) -> str:
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    return f"{sign}{value // 1000}.{value % 1000:03d}"
+
+
 def _date_from_hour_key(key: str) -> Optional[str]:
     if not key:
         return None
-    return key.split(" ", 1)[0] if " " in key else None
+    idx = key.find(" ")
+    return key[:idx] if idx >= 0 else None
 
 
 def _telegram_inline_keyboard(menu: str) -> Dict[str, Any]:
@@ -253,21 +362,29 @@ def _merge_hourly_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Dict[str, Any]
     return merged
 
 
-def _merge_hourly_series(hourly: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
-    return {key: _merge_hourly_snapshot(snapshot) for key, snapshot in hourly.items()}
+def _snapshot_view(
+    hourly: Dict[str, Any], keys: Optional[List[str]] = None
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Sorted hour keys plus the snapshots in the same order, built once and shared."""
+    if keys is None:
+        keys = sorted(hourly)
+    return keys, [hourly[key] for key in keys]
 
 
 def _parse_hour(key: str) -> Optional[int]:
+    # Keys are always "YYYY-MM-DD HH:MM"; slicing avoids strptime on every point.
+    if not key or len(key) != 16 or key[13] != ":":
+        return None
     try:
-        return datetime.strptime(key, "%Y-%m-%d %H:%M").hour
-    except Exception:
+        hour = int(key[11:13])
+    except ValueError:
         return None
+    return hour if 0 <= hour < 24 else None
 
 
 def _active_server_name_map(config: Dict[str, Any]) -> Dict[str, str]:
     try:
-        client = HetznerClient(config["hetzner"]["api_token"])
-        servers = client.get_servers()
+        servers = _recent_servers(config)
     except Exception:
         return {}
     return {str(s["id"]): s.get("name") or str(s["id"]) for s in servers}
@@ -305,34 +422,41 @@ def _compute_cycle_data(
     hourly: Dict[str, Any],
     include_ids: Optional[set] = None,
     name_map: Optional[Dict[str, str]] = None,
+    view: Optional[Tuple[List[str], List[Dict[str, Any]]]] = None,
+    deltas: Optional[List[Dict[str, Dict[str, Any]]]] = None,
 ) -> Dict[str, Any]:
-    keys = sorted(hourly.keys())
+    keys, snaps = view or _snapshot_view(hourly)
     if len(keys) < 2:
         return {"servers": {}}
 
     server_ids = set()
-    for snapshot in hourly.values():
+    for snapshot in snaps:
         server_ids.update(snapshot.keys())
     if include_ids:
         server_ids = {sid for sid in server_ids if str(sid) in include_ids}
 
+    # Deltas depend only on the pair of snapshots, not on the server being walked.
+    step_deltas = deltas if deltas is not None else _step_deltas(snaps)
+    # Per-key values shared by every server.
+    hours = [_parse_hour(key) for key in keys]
+
     servers: Dict[str, Any] = {}
     for sid in server_ids:
-        cycle_out = Decimal("0.000")
+        sid_str = str(sid)
+        cycle_out = 0
         cycle_age = 0
         points: List[Dict[str, Any]] = []
         rebuilds: List[str] = []
-        name = name_map.get(str(sid)) if name_map else None
+        name = name_map.get(sid_str) if name_map else None
 
         for i in range(1, len(keys)):
-            prev_key = keys[i - 1]
             curr_key = keys[i]
-            prev = hourly.get(prev_key, {})
-            curr = hourly.get(curr_key, {})
+            prev = snaps[i - 1]
+            curr = snaps[i]
             prev_data = prev.get(sid)
             curr_data = curr.get(sid)
             if curr_data and not name:
-                name = curr_data.get("name") or str(sid)
+                name = curr_data.get("name") or sid_str
 
             rebuild = False
             if prev_data and curr_data:
@@ -341,35 +465,107 @@ def _compute_cycle_data(
                 if prev_out is not None and curr_out is not None and float(curr_out) < float(prev_out):
                     rebuild = True
             if rebuild:
-                cycle_out = Decimal("0.000")
+                cycle_out = 0
                 cycle_age = 0
                 rebuilds.append(curr_key)
 
-            deltas = _delta_by_name(prev, curr)
-            data = deltas.get(sid, {})
-            total_out = data["out"] if data.get("has_out") else Decimal("0.000")
+            data = step_deltas[i - 1].get(sid, {})
+            total_out = data["out"] if data.get("has_out") else 0
             cycle_out += total_out
-            cycle_out = _quantize_tb(cycle_out)
             points.append(
                 {
                     "time": curr_key,
-                    "out_tb_h": str(_quantize_tb(total_out)),
-                    "cycle_out_cum_tb": str(cycle_out),
+                    "out_tb_h": _format_millitb(total_out),
+                    "cycle_out_cum_tb": _format_millitb(cycle_out),
                     "cycle_age_h": cycle_age,
-                    "hour_of_day": _parse_hour(curr_key),
+                    "hour_of_day": hours[i],
                 }
             )
             cycle_age += 1
 
         if points:
-            servers[str(sid)] = {"name": name or str(sid), "points": points, "rebuilds": rebuilds}
+            servers[sid_str] = {"name": name or sid_str, "points": points, "rebuilds": rebuilds}
 
     return {"servers": servers}
 
 def _delta_by_name(prev: Dict[str, Any], curr: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return _delta_merged(_merge_hourly_snapshot(prev), _merge_hourly_snapshot(curr))
+
+
+def _step_deltas(snaps: List[Dict[str, Any]]) -> List[Dict[str, Dict[str, Any]]]:
+    """Deltas for every consecutive pair; each snapshot is merged by name only once."""
+    merged = [_merge_hourly_snapshot(snapshot) for snapshot in snaps]
+    return [_delta_merged(merged[i - 1], merged[i]) for i in range(1, len(merged))]
+
+
+def _cached_step_deltas(
+    tag: Any, keys: List[str], load_snapshot
+) -> List[Dict[str, Dict[str, Any]]]:
+    """_step_deltas over keys, reusing the pairs already computed under the same tag.
+
+    tag must change whenever the snapshots may (report state stamp plus any filter);
+    load_snapshot(key) is only called for snapshots that are part of an uncached pair.
+    The returned deltas are shared between requests and must not be mutated.
+    """
+    if tag is None:
+        return _step_deltas([load_snapshot(key) for key in keys])
+    with _DELTA_CACHE_LOCK:
+        pairs = _DELTA_CACHE.pop(tag, None)
+        if pairs is None:
+            pairs = {}
+        _DELTA_CACHE[tag] = pairs
+        while len(_DELTA_CACHE) > _DELTA_CACHE_TAGS:
+            _DELTA_CACHE.pop(next(iter(_DELTA_CACHE)))
+    merged: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def _merged(key: str) -> Dict[str, Dict[str, Any]]:
+        if key not in merged:
+            merged[key] = _merge_hourly_snapshot(load_snapshot(key))
+        return merged[key]
+
+    deltas = []
+    for prev_key, curr_key in zip(keys, keys[1:]):
+        delta = pairs.get((prev_key, curr_key))
+        if delta is None:
+            delta = pairs[(prev_key, curr_key)] = _delta_merged(_merged(prev_key), _merged(curr_key))
+        deltas.append(delta)
+    return deltas
+
+
+def _hourly_delta_rows(
+    hours: List[str], step_deltas: List[Dict[str, Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """Per-name rows of hourly deltas; a row starts at the first hour its name appears in."""
+    first_seen: Dict[str, int] = {}
+    present: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for idx, deltas in enumerate(step_deltas):
+        for name, delta in deltas.items():
+            if name not in first_seen:
+                first_seen[name] = idx
+                present[name] = {}
+            present[name][idx] = delta
+    # Hours a server is missing from share one all-None entry per hour.
+    empty = [{"hour": hour, "tb": None, "in_tb": None} for hour in hours]
+    rows: Dict[str, Any] = {}
+    for name, start in first_seen.items():
+        seen = present[name]
+        entries = []
+        for idx in range(start, len(hours)):
+            delta = seen.get(idx)
+            if delta is None:
+                entries.append(empty[idx])
+                continue
+            delta_tb = _format_millitb(delta["out"]) if delta.get("has_out") else None
+            delta_in_tb = _format_millitb(delta["in"]) if delta.get("has_in") else None
+            entries.append({"hour": hours[idx], "tb": delta_tb, "in_tb": delta_in_tb})
+        rows[name] = {"name": name, "deltas": entries}
+    return rows
+
+
+def _delta_merged(
+    prev_by_name: Dict[str, Dict[str, Any]], curr_by_name: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
     aggregates: Dict[str, Dict[str, Any]] = {}
-    prev_by_name = _merge_hourly_snapshot(prev)
-    curr_by_name = _merge_hourly_snapshot(curr)
     for name, data in curr_by_name.items():
         prev_data = prev_by_name.get(name, {})
         prev_out = prev_data.get("outbound_bytes")
@@ -380,16 +576,16 @@ def _delta_by_name(prev: Dict[str, Any], curr: Dict[str, Any]) -> Dict[str, Dict
         in_delta = None
         if prev_out is not None and curr_out is not None:
             if float(curr_out) >= float(prev_out):
-                out_delta = _bytes_to_tb(float(curr_out) - float(prev_out))
+                out_delta = _bytes_to_millitb(float(curr_out) - float(prev_out))
             else:
-                out_delta = _bytes_to_tb(float(curr_out))
+                out_delta = _bytes_to_millitb(float(curr_out))
         if prev_in is not None and curr_in is not None:
             if float(curr_in) >= float(prev_in):
-                in_delta = _bytes_to_tb(float(curr_in) - float(prev_in))
+                in_delta = _bytes_to_millitb(float(curr_in) - float(prev_in))
             else:
-                in_delta = _bytes_to_tb(float(curr_in))
+                in_delta = _bytes_to_millitb(float(curr_in))
         entry = aggregates.setdefault(
-            name, {"out": Decimal("0.000"), "in": Decimal("0.000"), "has_out": False, "has_in": False}
+            name, {"out": 0, "in": 0, "has_out": False, "has_in": False}
         )
         if out_delta is not None:
             entry["out"] += out_delta
@@ -401,46 +597,48 @@ def _delta_by_name(prev: Dict[str, Any], curr: Dict[str, Any]) -> Dict[str, Dict
 
 
 def _compute_tracking_totals(
-    hourly: Dict[str, Any], start_override: Optional[str] = None
+    hourly: Dict[str, Any],
+    start_override: Optional[str] = None,
+    view: Optional[Tuple[List[str], List[Dict[str, Any]]]] = None,
+    deltas: Optional[List[Dict[str, Dict[str, Any]]]] = None,
 ) -> Dict[str, Optional[str]]:
-    keys = sorted(hourly.keys())
+    keys, snaps = view or _snapshot_view(hourly)
     if not keys:
         return {"start": None, "outbound_tb": "0.000", "inbound_tb": "0.000"}
     start_idx = 0
     start_label = keys[0]
     if start_override:
-        for idx, key in enumerate(keys):
-            if key >= start_override:
-                start_idx = idx
-                start_label = start_override
-                break
-        else:
+        start_idx = bisect.bisect_left(keys, start_override)
+        if start_idx == len(keys):
             return {"start": start_override, "outbound_tb": "0.000", "inbound_tb": "0.000"}
-    total_out = Decimal("0.000")
-    total_in = Decimal("0.000")
-    for i in range(start_idx + 1, len(keys)):
-        prev = hourly.get(keys[i - 1], {})
-        curr = hourly.get(keys[i], {})
-        deltas = _delta_by_name(prev, curr)
-        for data in deltas.values():
+        start_label = start_override
+    total_out = 0
+    total_in = 0
+    steps = deltas[start_idx:] if deltas is not None else _step_deltas(snaps[start_idx:])
+    for step in steps:
+        for data in step.values():
             if data.get("has_out"):
                 total_out += data["out"]
             if data.get("has_in"):
                 total_in += data["in"]
     return {
         "start": start_label,
-        "outbound_tb": str(_quantize_tb(total_out)),
-        "inbound_tb": str(_quantize_tb(total_in)),
+        "outbound_tb": _format_millitb(total_out),
+        "inbound_tb": _format_millitb(total_in),
     }
 
 
-def _detect_last_rebuilds(hourly: Dict[str, Any], name_map: Optional[Dict[str, str]] = None) -> Dict[str, str]:
-    keys = sorted(hourly.keys())
+def _detect_last_rebuilds(
+    hourly: Dict[str, Any],
+    name_map: Optional[Dict[str, str]] = None,
+    view: Optional[Tuple[List[str], List[Dict[str, Any]]]] = None,
+) -> Dict[str, str]:
+    keys, snaps = view or _snapshot_view(hourly)
     last: Dict[str, str] = {}
     prev_out: Dict[str, float] = {}
-    name_to_id = {name: sid for sid, name in (name_map or {}).items()}
-    for key in keys:
-        snapshot = hourly.get(key, {})
+    fallback_names = name_map or {}
+    name_to_id = {name: sid for sid, name in fallback_names.items()}
+    for key, snapshot in zip(keys, snaps):
         for sid, data in snapshot.items():
             out = data.get("outbound_bytes")
             if out is None:
@@ -449,7 +647,7 @@ def _detect_last_rebuilds(hourly: Dict[str, Any], name_map: Optional[Dict[str, s
                 current = float(out)
             except Exception:
                 continue
-            name = data.get("name") or (name_map.get(str(sid)) if name_map else None) or str(sid)
+            name = data.get("name") or fallback_names.get(str(sid)) or str(sid)
             prev = prev_out.get(name)
             if prev is not None and current < prev:
                 mapped_id = name_to_id.get(name)
@@ -458,6 +656,80 @@ def _detect_last_rebuilds(hourly: Dict[str, Any], name_map: Optional[Dict[str, s
     return last
 
 
+class HourlySummary(NamedTuple):
+    cycle_data: Optional[Dict[str, Any]]
+    tracking_totals: Optional[Dict[str, Optional[str]]]
+    last_rebuilds: Optional[Dict[str, str]]
+
+
+def _tagged_memo(cache: Dict[Any, Any], key: Any, compute) -> Any:
+    """compute() memoised under key, keeping only the _DELTA_CACHE_TAGS most recent keys."""
+    if key[0] is None:
+        return compute()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        with _DELTA_CACHE_LOCK:
+            cache[key] = value
+            while len(cache) > _DELTA_CACHE_TAGS:
+                cache.pop(next(iter(cache)))
+    return value
+
+
+def _sorted_hour_keys(hourly: Dict[str, Any], stamp: Any) -> List[str]:
+    """sorted(hourly), reused while stamp is unchanged; the list is shared, so don't mutate it."""
+    return _tagged_memo(_HOUR_KEYS_CACHE, (stamp,), lambda: sorted(hourly))
+
+
+def _compute_all(
+    hourly: Dict[str, Any],
+    tracking_start: Optional[str] = None,
+    include_ids: Optional[set] = None,
+    name_map: Optional[Dict[str, str]] = None,
+    with_cycle: bool = True,
+    with_totals: bool = True,
+    cache_tag: Any = None,
+) -> HourlySummary:
+    """Sort the history and compute the step deltas once, then feed every reducer from them.
+
+    Reducers switched off with with_cycle/with_totals are skipped and left as None.
+    With a cache_tag, tracking totals and last rebuilds are reused until the tag changes.
+    """
+    shared: Dict[str, Any] = {}
+
+    def _view() -> Tuple[List[str], List[Dict[str, Any]]]:
+        if "view" not in shared:
+            shared["view"] = _snapshot_view(hourly, _sorted_hour_keys(hourly, cache_tag))
+        return shared["view"]
+
+    def _deltas() -> List[Dict[str, Dict[str, Any]]]:
+        if "deltas" not in shared:
+            shared["deltas"] = _cached_step_deltas(cache_tag, _view()[0], hourly.__getitem__)
+        return shared["deltas"]
+
+    cycle_data = None
+    if with_cycle:
+        cycle_data = _compute_cycle_data(hourly, include_ids, name_map, view=_view(), deltas=_deltas())
+    tracking_totals = None
+    last_rebuilds = None
+    if with_totals:
+        tracking_totals = _tagged_memo(
+            _TRACKING_CACHE,
+            (cache_tag, tracking_start),
+            lambda: _compute_tracking_totals(hourly, tracking_start, view=_view(), deltas=_deltas()),
+        )
+        last_rebuilds = _tagged_memo(
+            _REBUILD_CACHE,
+            (cache_tag, frozenset((name_map or {}).items())),
+            lambda: _detect_last_rebuilds(hourly, name_map, view=_view()),
+        )
+    return HourlySummary(
+        cycle_data=cycle_data,
+        tracking_totals=tracking_totals,
+        last_rebuilds=last_rebuilds,
+    )
+
+
 class HetznerClient:
     BASE_URL = "https://api.hetzner.cloud/v1"
     CF_API_BASE = "https://api.cloudflare.com/client/v4"
@@ -468,10 +740,11 @@ class HetznerClient:
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
+        self._session = _build_session()
 
     def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         url = f"{self.BASE_URL}/{endpoint}"
-        resp = requests.request(method, url, headers=self.headers, timeout=20, **kwargs)
+        resp = self._session.request(method, url, headers=self.headers, timeout=20, **kwargs)
         resp.raise_for_status()
         return resp.json()
 
@@ -531,6 +804,13 @@ class HetznerClient:
         except Exception:
             return []
 
+    def get_latest_snapshot(self) -> Optional[Dict[str, Any]]:
+        try:
+            data = self._request("GET", "images", params={"type": "snapshot"})
+        except Exception:
+            return None
+        return max(data.get("images", []), key=lambda x: x.get("created", ""), default=None)
+
     def create_snapshot(self, server_id: int, description: str = "") -> Optional[Dict[str, Any]]:
         try:
             payload: Dict[str, Any] = {"type": "snapshot"}
@@ -575,10 +855,10 @@ class HetznerClient:
         if mapped_id:
             image = mapped_id
         else:
-            snapshots = self.get_snapshots()
-            if not snapshots:
+            latest = self.get_latest_snapshot()
+            if not latest:
                 return {"success": False, "error": "没有可用快照，已取消重建"}
-            image = snapshots[0]["id"]
+            image = latest["id"]
 
         if not self.delete_server(server_id):
             return {"success": False, "error": "删除服务器失败"}
@@ -624,7 +904,7 @@ class HetznerClient:
                 }
                 list_url = f"{self.CF_API_BASE}/zones/{zone_id}/dns_records"
                 params = {"type": "A", "name": record_name}
-                resp = requests.get(list_url, headers=headers, params=params, timeout=15)
+                resp = _CF_SESSION.get(list_url, headers=headers, params=params, timeout=15)
                 resp.raise_for_status()
                 data = resp.json()
                 records = data.get("result", [])
@@ -640,7 +920,7 @@ class HetznerClient:
                     "ttl": record.get("ttl", 1),
                     "proxied": record.get("proxied", False),
                 }
-                upd = requests.put(update_url, headers=headers, json=payload, timeout=15)
+                upd = _CF_SESSION.put(update_url, headers=headers, json=payload, timeout=15)
                 upd.raise_for_status()
                 return {"success": True}
             except Exception as e:
@@ -649,6 +929,32 @@ class HetznerClient:
         return {"success": False, "error": str(last_error)}
 
 
+def _get_client(config: Dict[str, Any]) -> "HetznerClient":
+    """One HetznerClient per API token, shared so its connection pool survives between calls."""
+    token = config["hetzner"]["api_token"]
+    client = _HETZNER_CLIENTS.get(token)
+    if client is None:
+        with _HETZNER_CLIENTS_LOCK:
+            client = _HETZNER_CLIENTS.get(token)
+            if client is None:
+                client = _HETZNER_CLIENTS[token] = HetznerClient(token)
+    return client
+
+
+def _remember_servers(config: Dict[str, Any], servers: List[Dict[str, Any]]) -> None:
+    _SERVER_LIST_CACHE[config["hetzner"]["api_token"]] = (time.monotonic(), servers)
+
+
+def _recent_servers(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Server list fetched within SERVER_LIST_TTL, for callers that only need ids and names."""
+    cached = _SERVER_LIST_CACHE.get(config["hetzner"]["api_token"])
+    if cached and time.monotonic() - cached[0] < SERVER_LIST_TTL:
+        return cached[1]
+    servers = _get_client(config).get_servers()
+    _remember_servers(config, servers)
+    return servers
+
+
 def _get_basic_auth(request: Request) -> Optional[tuple]:
     auth = request.headers.get("Authorization")
     if not auth or not auth.startswith("Basic "):
@@ -670,7 +976,14 @@ def _require_auth(request: Request) -> None:
     if not auth:
         raise HTTPException(status_code=401, detail="Unauthorized")
     user, pwd = auth
-    if user != cfg.get("username") or pwd != cfg.get("password"):
+    expected_user = cfg.get("username")
+    expected_pwd = cfg.get("password")
+    if not isinstance(expected_user, str) or not isinstance(expected_pwd, str):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    # Constant-time comparisons; evaluate both so the username check can't be timed on its own.
+    user_ok = hmac.compare_digest(user.encode("utf-8"), expected_user.encode("utf-8"))
+    pwd_ok = hmac.compare_digest(pwd.encode("utf-8"), expected_pwd.encode("utf-8"))
+    if not (user_ok and pwd_ok):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
@@ -692,17 +1005,27 @@ def _format_iso(dt: datetime) -> str:
     return dt.isoformat()
 
 
+def _parse_series_time(point: List[Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(point[0].replace("Z", "+00:00"))
+    except Exception:
+        return None
+
+
 def _integrate_time_series(series: List[List[Any]]) -> float:
     total = 0.0
     if not series or len(series) < 2:
         return 0.0
+    # Parse every timestamp once rather than twice per interval.
+    times = [_parse_series_time(point) for point in series]
     for i in range(len(series) - 1):
+        t_curr = times[i]
+        t_next = times[i + 1]
+        if t_curr is None or t_next is None:
+            continue
         try:
             value = float(series[i][1])
-            t_curr = datetime.fromisoformat(series[i][0].replace("Z", "+00:00"))
-            t_next = datetime.fromisoformat(series[i + 1][0].replace("Z", "+00:00"))
-            duration = (t_next - t_curr).total_seconds()
-            total += value * duration
+            total += value * (t_next - t_curr).total_seconds()
         except Exception:
             continue
     return total
@@ -721,6 +1044,20 @@ def _get_today_traffic_bytes(client: "HetznerClient", server_id: int) -> Dict[st
     }
 
 
+def _fetch_server_details(
+    client: "HetznerClient", servers: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    # The list payload already carries the traffic counters; only fetch servers where they're missing,
+    # concurrently so wall time doesn't grow with the fleet.
+    details = [s if "outgoing_traffic" in s and "ingoing_traffic" in s else None for s in servers]
+    missing = [i for i, detail in enumerate(details) if detail is None]
+    if missing:
+        fetched = _FANOUT_POOL.map(client.get_server, [servers[i]["id"] for i in missing])
+        for i, detail in zip(missing, fetched):
+            details[i] = detail or {}
+    return details
+
+
 def _send_telegram_message(
     bot_token: str,
     chat_id: str,
@@ -734,7 +1071,7 @@ def _send_telegram_message(
         payload: Dict[str, Any] = {"chat_id": chat_id, "text": text}
         if reply_markup:
             payload["reply_markup"] = reply_markup
-        resp = requests.post(url, json=payload, timeout=15)
+        resp = _TG_SESSION.post(url, data=_json_dumps(payload), headers=_JSON_HEADERS, timeout=15)
         resp.raise_for_status()
         return True
     except Exception as e:
@@ -755,7 +1092,7 @@ def _send_telegram_markdown(
         payload: Dict[str, Any] = {"chat_id": chat_id, "text": text, "parse_mode": "Markdown"}
         if reply_markup:
             payload["reply_markup"] = reply_markup
-        resp = requests.post(url, json=payload, timeout=15)
+        resp = _TG_SESSION.post(url, data=_json_dumps(payload), headers=_JSON_HEADERS, timeout=15)
         resp.raise_for_status()
         return True
     except Exception as e:
@@ -768,7 +1105,7 @@ def _answer_telegram_callback(bot_token: str, callback_id: Optional[str]) -> Non
         return
     url = f"https://api.telegram.org/bot{bot_token}/answerCallbackQuery"
     try:
-        requests.post(url, json={"callback_query_id": callback_id}, timeout=10)
+        _TG_SESSION.post(url, data=_json_dumps({"callback_query_id": callback_id}), headers=_JSON_HEADERS, timeout=10)
     except Exception as e:
         print(f"[alert] telegram callback answer failed: {e}")
 
@@ -866,6 +1203,17 @@ def _resolve_cf_record(record_cfg: Any, fallback_zone: str, fallback_token: str)
     return None
 
 
+async def _resolve_a_record(record: str, timeout: float = 5) -> str:
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(record, None, family=socket.AF_INET, type=socket.SOCK_STREAM), timeout
+        )
+    except asyncio.TimeoutError:
+        raise TimeoutError("timed out") from None
+    return infos[0][4][0]
+
+
 def _verify_dns_record(record: str, expected_ip: str) -> Dict[str, Any]:
     try:
         socket.setdefaulttimeout(5)
@@ -887,8 +1235,7 @@ def _build_daily_report(config: Dict[str, Any], client: "HetznerClient") -> str:
 
     servers = client.get_servers()
     lines = [f"📅 **每日定时战报 ({_now_local().strftime('%Y-%m-%d')})**"]
-    for s in servers:
-        detail = client.get_server(s["id"]) or {}
+    for s, detail in zip(servers, _fetch_server_details(client, servers)):
         outgoing = detail.get("outgoing_traffic")
         ingoing = detail.get("ingoing_traffic")
         if outgoing is None or ingoing is None:
@@ -912,9 +1259,8 @@ def _build_daily_report(config: Dict[str, Any], client: "HetznerClient") -> str:
 def _collect_traffic_snapshot(client: "HetznerClient") -> Dict[str, Any]:
     servers = client.get_servers()
     snapshot: Dict[str, Any] = {}
-    for server in servers:
+    for server, detail in zip(servers, _fetch_server_details(client, servers)):
         sid = str(server["id"])
-        detail = client.get_server(server["id"]) or {}
         snapshot[sid] = {
             "name": detail.get("name") or server.get("name") or sid,
             "outbound_bytes": detail.get("outgoing_traffic"),
@@ -1259,7 +1605,7 @@ def _schedule_loop() -> None:
                 for t in times:
                     key = f"{action}:{t}"
                     if current_time == t and last_runs.get(key) != current_date:
-                        client = HetznerClient(config["hetzner"]["api_token"])
+                        client = _get_client(config)
                         _run_schedule_task(action, config, client)
                         _save_yaml(CONFIG_PATH, config)
                         last_runs[key] = current_date
@@ -1292,12 +1638,11 @@ def _monitor_traffic_loop() -> None:
                 continue
 
             levels = _parse_alert_levels(telegram_cfg.get("notify_levels"))
-            client = HetznerClient(config["hetzner"]["api_token"])
+            client = _get_client(config)
             servers = client.get_servers()
 
-            for s in servers:
+            for s, detail in zip(servers, _fetch_server_details(client, servers)):
                 sid = str(s["id"])
-                detail = client.get_server(s["id"]) or {}
                 outgoing = detail.get("outgoing_traffic")
                 if outgoing is None:
                     continue
@@ -1365,8 +1710,20 @@ def _monitor_traffic_loop() -> None:
         time.sleep(interval_seconds)
 
 
+def _seconds_until(hhmm: str, now: datetime) -> Optional[float]:
+    try:
+        hour, minute = (int(part) for part in hhmm.split(":"))
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except (AttributeError, ValueError):
+        return None
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
 def _daily_report_loop() -> None:
     while True:
+        wait = 30.0
         try:
             config = _load_yaml(CONFIG_PATH)
             telegram_cfg = config.get("telegram", {})
@@ -1383,13 +1740,16 @@ def _daily_report_loop() -> None:
             current_time = now.strftime("%H:%M")
             current_date = now.strftime("%Y-%m-%d")
             if current_time == daily_time and SCHEDULE_STATE.get("last_daily_report") != current_date:
-                client = HetznerClient(config["hetzner"]["api_token"])
+                client = _get_client(config)
                 report = _build_daily_report(config, client)
                 _send_telegram_markdown(bot_token, chat_id, report)
                 SCHEDULE_STATE["last_daily_report"] = current_date
+                now = _now_local()
+            # Sleep until the report is due, waking periodically so config edits are noticed.
+            wait = min(_seconds_until(daily_time, now) or wait, DAILY_REPORT_RECHECK_SECONDS)
         except Exception as e:
             print(f"[alert] daily report error: {e}")
-        time.sleep(30)
+        time.sleep(wait)
 
 
 def _snapshot_loop() -> None:
@@ -1400,7 +1760,7 @@ def _snapshot_loop() -> None:
             if not token:
                 time.sleep(60)
                 continue
-            client = HetznerClient(token)
+            client = _get_client(config)
             state = _load_report_state()
             interval_minutes = (config.get("traffic") or {}).get("check_interval", 5)
             now = _now_local()
@@ -1578,8 +1938,7 @@ def _handle_bot_command(text: str, config: Dict[str, Any], client: "HetznerClien
         if not args:
             servers = client.get_servers()
             lines = ["📊 *流量汇总* (出站计费)\n"]
-            for s in servers:
-                detail = client.get_server(s["id"]) or {}
+            for s, detail in zip(servers, _fetch_server_details(client, servers)):
                 outgoing = detail.get("outgoing_traffic")
                 name = detail.get("name") or s.get("name") or s["id"]
                 if outgoing is None or not limit_tb:
@@ -1799,7 +2158,7 @@ def _handle_bot_command(text: str, config: Dict[str, Any], client: "HetznerClien
         chat_id = telegram_cfg.get("chat_id", "")
         def _task() -> None:
             cfg = _load_yaml(CONFIG_PATH)
-            cli = HetznerClient(cfg["hetzner"]["api_token"])
+            cli = _get_client(cfg)
             _create_from_snapshot_map(cfg, cli)
             _save_yaml(CONFIG_PATH, cfg)
             if telegram_cfg.get("enabled") and bot_token and chat_id:
@@ -1823,7 +2182,7 @@ def _handle_bot_command(text: str, config: Dict[str, Any], client: "HetznerClien
 
         def _task() -> None:
             cfg = _load_yaml(CONFIG_PATH)
-            cli = HetznerClient(cfg["hetzner"]["api_token"])
+            cli = _get_client(cfg)
             rb = cfg.get("rebuild", {}) or {}
             snap_map = rb.get("snapshot_id_map", {}) or {}
             snap_id = snap_map.get(str(target_id))
@@ -1988,6 +2347,7 @@ def _handle_bot_callback(
 
 
 def _telegram_bot_loop() -> None:
+    backoff = 3
     while True:
         try:
             config = _load_yaml(CONFIG_PATH)
@@ -2003,9 +2363,11 @@ def _telegram_bot_loop() -> None:
 
             offset = BOT_STATE.get("update_offset", 0)
             url = f"https://api.telegram.org/bot{bot_token}/getUpdates"
-            resp = requests.get(url, params={"timeout": 25, "offset": offset}, timeout=30)
+            # Long poll: Telegram holds the request open until an update arrives, so no sleep is needed.
+            params = {"timeout": 50, "offset": offset, "allowed_updates": _TG_ALLOWED_UPDATES}
+            resp = _TG_SESSION.get(url, params=params, timeout=(5, 60))
             resp.raise_for_status()
-            data = resp.json()
+            data = _json_loads(resp.content)
             if not data.get("ok"):
                 time.sleep(10)
                 continue
@@ -2051,7 +2413,7 @@ def _telegram_bot_loop() -> None:
                         continue
                     BOT_STATE["last_message_id"] = message_id
                     BOT_STATE["last_message_text"] = text
-                client = HetznerClient(config["hetzner"]["api_token"])
+                client = _get_client(config)
                 reply = _handle_bot_command(text, config, client)
                 menu_state = BOT_STATE.get("menu_state") or "root"
                 _send_telegram_markdown(
@@ -2068,9 +2430,11 @@ def _telegram_bot_loop() -> None:
                         reply_markup=_telegram_reply_keyboard_root(),
                     )
                     BOT_STATE["reply_keyboard_enabled"] = True
+            backoff = 3
         except Exception as e:
             print(f"[alert] telegram bot error: {e}")
-        time.sleep(3)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
 
 
 app = FastAPI()
@@ -2087,7 +2451,7 @@ def _start_traffic_monitor() -> None:
     def _sync_wrapper() -> None:
         try:
             config = _load_yaml(CONFIG_PATH)
-            client = HetznerClient(config["hetzner"]["api_token"])
+            client = _get_client(config)
             _sync_cloudflare_records(config, client)
         except Exception as e:
             print(f"[alert] cloudflare sync error: {e}")
@@ -2108,8 +2472,9 @@ def demo() -> FileResponse:
 def api_servers(request: Request) -> JSONResponse:
     _require_auth(request)
     config = _load_yaml(CONFIG_PATH)
-    client = HetznerClient(config["hetzner"]["api_token"])
+    client = _get_client(config)
     servers = client.get_servers()
+    _remember_servers(config, servers)
     traffic_cfg = config.get("traffic", {})
     limit_gb = traffic_cfg.get("limit_gb")
     limit_tb = None
@@ -2119,8 +2484,7 @@ def api_servers(request: Request) -> JSONResponse:
         except Exception:
             limit_tb = None
     rows = []
-    for s in servers:
-        detail = client.get_server(s["id"]) or {}
+    for s, detail in zip(servers, _fetch_server_details(client, servers)):
         outgoing = detail.get("outgoing_traffic")
         ingoing = detail.get("ingoing_traffic")
         outbound_tb = _bytes_to_tb(float(outgoing)) if outgoing is not None else Decimal("0.000")
@@ -2139,12 +2503,19 @@ def api_servers(request: Request) -> JSONResponse:
                 "inbound_bytes": ingoing,
             }
         )
-    state = _load_json(REPORT_STATE_PATH)
+    state, state_stamp = _load_json_versioned(REPORT_STATE_PATH)
     web_cfg = _load_json(WEB_CONFIG_PATH)
-    hourly = _merge_hourly_series(state.get("hourly", {}))
-    tracking = _compute_tracking_totals(hourly, web_cfg.get("tracking_start"))
     name_map = {str(s["id"]): s.get("name") or str(s["id"]) for s in servers}
-    rebuilds = _detect_last_rebuilds(state.get("hourly", {}), name_map)
+    # Step deltas merge snapshots by name themselves, so the raw history feeds both reducers.
+    summary = _compute_all(
+        state.get("hourly", {}),
+        web_cfg.get("tracking_start"),
+        name_map=name_map,
+        with_cycle=False,
+        cache_tag=state_stamp,
+    )
+    tracking = summary.tracking_totals
+    rebuilds = summary.last_rebuilds
     return JSONResponse(
         {
             "servers": rows,
@@ -2166,7 +2537,7 @@ async def api_rebuild(request: Request) -> JSONResponse:
     payload = await request.json()
     server_id = int(payload.get("server_id"))
     config = _load_yaml(CONFIG_PATH)
-    client = HetznerClient(config["hetzner"]["api_token"])
+    client = _get_client(config)
     result = client.rebuild_server(server_id, config)
     if not result.get("success"):
         return JSONResponse(result, status_code=500)
@@ -2190,156 +2561,141 @@ async def api_dns_check(request: Request) -> JSONResponse:
     payload = await request.json()
     server_id = payload.get("server_id")
     config = _load_yaml(CONFIG_PATH)
-    client = HetznerClient(config["hetzner"]["api_token"])
-    servers = client.get_servers()
+    client = _get_client(config)
+    # Off the event loop; a single server only needs a point lookup, not the full list.
     if server_id:
-        servers = [s for s in servers if s["id"] == int(server_id)]
+        detail = await asyncio.to_thread(client.get_server, int(server_id))
+        servers = [detail] if detail else []
+    else:
+        servers = await asyncio.to_thread(client.get_servers)
     cf_cfg = config.get("cloudflare", {})
     record_map = cf_cfg.get("record_map", {})
-    results = []
+    checks = []
     for s in servers:
         record = record_map.get(str(s["id"])) or record_map.get(s.get("name", ""))
         ip = s["public_net"]["ipv4"]["ip"] if s["public_net"].get("ipv4") else None
+        checks.append((s, record, ip))
+    # Resolve every record concurrently without blocking the event loop.
+    lookups = await asyncio.gather(
+        *(_resolve_a_record(record) for _, record, ip in checks if record and ip),
+        return_exceptions=True,
+    )
+    lookups_iter = iter(lookups)
+    results = []
+    for s, record, ip in checks:
         if not record or not ip:
             results.append({"id": s["id"], "status": "missing"})
             continue
-        try:
-            socket.setdefaulttimeout(5)
-            resolved = socket.gethostbyname(record)
-            ok = resolved == ip
-            results.append({"id": s["id"], "record": record, "resolved": resolved, "expected": ip, "ok": ok})
-        except Exception as e:
-            results.append({"id": s["id"], "record": record, "error": str(e)})
+        resolved = next(lookups_iter)
+        if isinstance(resolved, BaseException):
+            results.append({"id": s["id"], "record": record, "error": str(resolved)})
+            continue
+        ok = resolved == ip
+        results.append({"id": s["id"], "record": record, "resolved": resolved, "expected": ip, "ok": ok})
     return JSONResponse({"results": results})
 
 
 @app.get("/api/hourly")
 def api_hourly(request: Request, date: Optional[str] = None) -> JSONResponse:
     _require_auth(request)
-    state = _load_json(REPORT_STATE_PATH)
+    state, state_stamp = _load_json_versioned(REPORT_STATE_PATH)
     hourly = state.get("hourly", {})
     config = _load_yaml(CONFIG_PATH)
     name_map = _active_server_name_map(config)
     include_ids = set(name_map.keys()) if name_map else None
     include_names = set(name_map.values()) if name_map else None
-    keys = sorted(hourly.keys())
+    cache_tag = (state_stamp, frozenset(name_map.items())) if state_stamp else None
+
+    def _filtered(key: str) -> Dict[str, Any]:
+        return _filter_snapshot(hourly[key], include_ids, name_map, include_names)
+
+    keys = _sorted_hour_keys(hourly, state_stamp)
     if date:
         try:
             datetime.strptime(date, "%Y-%m-%d")
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format")
-        selected_keys = [key for key in keys if key.startswith(date)]
+        # Keys sharing the date prefix are contiguous in sorted order.
+        lo = bisect.bisect_left(keys, date)
+        hi = lo
+        while hi < len(keys) and keys[hi].startswith(date):
+            hi += 1
+        selected_keys = keys[lo:hi]
         if not selected_keys:
             return JSONResponse({"servers": {}, "hours": []})
-        prev_map = {keys[i]: keys[i - 1] for i in range(1, len(keys))}
-        rows: Dict[str, Any] = {}
-        for curr_key in selected_keys:
-            prev_key = prev_map.get(curr_key)
-            prev_raw = hourly.get(prev_key, {}) if prev_key else {}
-            curr_raw = hourly.get(curr_key, {})
-            prev = _filter_snapshot(prev_raw, include_ids, name_map, include_names)
-            curr = _filter_snapshot(curr_raw, include_ids, name_map, include_names)
-            deltas = _delta_by_name(prev, curr)
-            for name in deltas:
-                if name not in rows:
-                    rows[name] = {"name": name, "deltas": []}
-            for name, data in rows.items():
-                delta = deltas.get(name, {})
-                delta_tb = str(_quantize_tb(delta["out"])) if delta.get("has_out") else None
-                delta_in_tb = str(_quantize_tb(delta["in"])) if delta.get("has_in") else None
-                data["deltas"].append({"hour": curr_key, "tb": delta_tb, "in_tb": delta_in_tb})
-        return JSONResponse({"servers": rows, "hours": selected_keys})
+        # Each selected hour is diffed against the key before it; the very first key has none.
+        step_deltas = _cached_step_deltas(cache_tag, keys[max(lo - 1, 0):hi], _filtered)
+        if lo == 0:
+            step_deltas.insert(0, _delta_by_name({}, _filtered(keys[0])))
+        return JSONResponse({"servers": _hourly_delta_rows(selected_keys, step_deltas), "hours": selected_keys})
 
     keys = keys[-25:]
-    rows: Dict[str, Any] = {}
-    for i in range(1, len(keys)):
-        prev_key = keys[i - 1]
-        curr_key = keys[i]
-        prev_raw = hourly.get(prev_key, {})
-        curr_raw = hourly.get(curr_key, {})
-        prev = _filter_snapshot(prev_raw, include_ids, name_map, include_names)
-        curr = _filter_snapshot(curr_raw, include_ids, name_map, include_names)
-        deltas = _delta_by_name(prev, curr)
-        for name in deltas:
-            if name not in rows:
-                rows[name] = {"name": name, "deltas": []}
-        for name, data in rows.items():
-            delta = deltas.get(name, {})
-            delta_tb = str(_quantize_tb(delta["out"])) if delta.get("has_out") else None
-            delta_in_tb = str(_quantize_tb(delta["in"])) if delta.get("has_in") else None
-            data["deltas"].append({"hour": curr_key, "tb": delta_tb, "in_tb": delta_in_tb})
+    rows = _hourly_delta_rows(keys[1:], _cached_step_deltas(cache_tag, keys, _filtered))
     return JSONResponse({"servers": rows, "hours": keys[1:]})
 
 
 @app.get("/api/daily")
 def api_daily(request: Request) -> JSONResponse:
     _require_auth(request)
-    state = _load_json(REPORT_STATE_PATH)
+    state, state_stamp = _load_json_versioned(REPORT_STATE_PATH)
     hourly = state.get("hourly", {})
     config = _load_yaml(CONFIG_PATH)
     name_map = _active_server_name_map(config)
     include_ids = set(name_map.keys()) if name_map else None
     include_names = set(name_map.values()) if name_map else None
-    keys = sorted(hourly.keys())
+    cache_tag = (state_stamp, frozenset(name_map.items())) if state_stamp else None
+
+    def _filtered(key: str) -> Dict[str, Any]:
+        return _filter_snapshot(hourly[key], include_ids, name_map, include_names)
+
+    keys = _sorted_hour_keys(hourly, state_stamp)
     if len(keys) < 2:
         return JSONResponse({"days": [], "peak": "0.000", "total": "0.000", "servers": []})
 
-    daily_totals: Dict[str, Decimal] = {}
-    daily_in_totals: Dict[str, Decimal] = {}
-    per_server: Dict[str, Dict[str, Decimal]] = {}
-    per_server_in: Dict[str, Dict[str, Decimal]] = {}
-    for i in range(1, len(keys)):
-        prev_key = keys[i - 1]
-        curr_key = keys[i]
+    # All totals are integer milli-TB; formatted only when building the response.
+    daily_totals: Dict[str, int] = defaultdict(int)
+    daily_in_totals: Dict[str, int] = defaultdict(int)
+    per_server: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    per_server_in: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for curr_key, deltas in zip(keys[1:], _cached_step_deltas(cache_tag, keys, _filtered)):
         date_key = _date_from_hour_key(curr_key)
         if not date_key:
             continue
-        prev_raw = hourly.get(prev_key, {})
-        curr_raw = hourly.get(curr_key, {})
-        prev = _filter_snapshot(prev_raw, include_ids, name_map, include_names)
-        curr = _filter_snapshot(curr_raw, include_ids, name_map, include_names)
-        deltas = _delta_by_name(prev, curr)
         for name, data in deltas.items():
             if data.get("has_out"):
-                delta_tb = data["out"]
-                daily_totals[date_key] = daily_totals.get(date_key, Decimal("0.000")) + delta_tb
-                if name not in per_server:
-                    per_server[name] = {}
-                per_server[name][date_key] = per_server[name].get(date_key, Decimal("0.000")) + delta_tb
+                daily_totals[date_key] += data["out"]
+                per_server[name][date_key] += data["out"]
             if data.get("has_in"):
-                delta_in_tb = data["in"]
-                daily_in_totals[date_key] = daily_in_totals.get(date_key, Decimal("0.000")) + delta_in_tb
-                if name not in per_server_in:
-                    per_server_in[name] = {}
-                per_server_in[name][date_key] = per_server_in[name].get(date_key, Decimal("0.000")) + delta_in_tb
+                daily_in_totals[date_key] += data["in"]
+                per_server_in[name][date_key] += data["in"]
 
     day_keys = sorted(daily_totals.keys())
     day_keys = day_keys[-35:]
     days = []
-    for date_key in day_keys:
-        total = _quantize_tb(daily_totals[date_key])
-        inbound_total = _quantize_tb(daily_in_totals.get(date_key, Decimal("0.000")))
-        days.append({"date": date_key, "outbound_tb": str(total), "inbound_tb": str(inbound_total)})
-
-    peak = _quantize_tb(max((Decimal(d["outbound_tb"]) for d in days), default=Decimal("0.000")))
-    total = _quantize_tb(sum((Decimal(d["outbound_tb"]) for d in days), Decimal("0.000")))
-    in_peak = _quantize_tb(max((Decimal(d["inbound_tb"]) for d in days), default=Decimal("0.000")))
-    in_total = _quantize_tb(sum((Decimal(d["inbound_tb"]) for d in days), Decimal("0.000")))
+    out_values = [daily_totals[date_key] for date_key in day_keys]
+    in_values = [daily_in_totals.get(date_key, 0) for date_key in day_keys]
+    for date_key, total, inbound_total in zip(day_keys, out_values, in_values):
+        days.append(
+            {"date": date_key, "outbound_tb": _format_millitb(total), "inbound_tb": _format_millitb(inbound_total)}
+        )
+
     servers = []
     for name in sorted(per_server.keys()):
         rows = []
         for date_key in day_keys:
-            value = _quantize_tb(per_server[name].get(date_key, Decimal("0.000")))
-            in_value = _quantize_tb(per_server_in.get(name, {}).get(date_key, Decimal("0.000")))
-            rows.append({"date": date_key, "outbound_tb": str(value), "inbound_tb": str(in_value)})
+            value = per_server[name].get(date_key, 0)
+            in_value = per_server_in.get(name, {}).get(date_key, 0)
+            rows.append(
+                {"date": date_key, "outbound_tb": _format_millitb(value), "inbound_tb": _format_millitb(in_value)}
+            )
         servers.append({"id": name, "name": name, "days": rows})
     return JSONResponse(
         {
             "days": days,
-            "peak": str(peak),
-            "total": str(total),
-            "in_peak": str(in_peak),
-            "in_total": str(in_total),
+            "peak": _format_millitb(max(out_values, default=0)),
+            "total": _format_millitb(sum(out_values)),
+            "in_peak": _format_millitb(max(in_values, default=0)),
+            "in_total": _format_millitb(sum(in_values)),
             "servers": servers,
         }
     )
@@ -2348,11 +2704,18 @@ def api_daily(request: Request) -> JSONResponse:
 @app.get("/api/cycle")
 def api_cycle(request: Request) -> JSONResponse:
     _require_auth(request)
-    state = _load_json(REPORT_STATE_PATH)
+    state, state_stamp = _load_json_versioned(REPORT_STATE_PATH)
     hourly = state.get("hourly", {})
     config = _load_yaml(CONFIG_PATH)
-    client = HetznerClient(config["hetzner"]["api_token"])
-    servers = client.get_servers()
+    # Only ids and names are needed here, so a list fetched in the last minute will do.
+    servers = _recent_servers(config)
     include_ids = {str(s["id"]) for s in servers}
     name_map = {str(s["id"]): s.get("name") or str(s["id"]) for s in servers}
-    return JSONResponse(_compute_cycle_data(hourly, include_ids=include_ids, name_map=name_map))
+    summary = _compute_all(
+        hourly,
+        include_ids=include_ids,
+        name_map=name_map,
+        with_totals=False,
+        cache_tag=state_stamp,
+    )
+    return JSONResponse(summary.cycle_data)
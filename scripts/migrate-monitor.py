@@ -6,6 +6,9 @@ import time
 
 import yaml
 
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 WANT = {
     "HETZNER_TOKEN",
@@ -40,12 +43,12 @@ def _load_yaml(path: str) -> dict:
     if not os.path.exists(path):
         return {}
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+        return yaml.load(f, Loader=YamlLoader) or {}
 
 
 def _dump_yaml(path: str, data: dict) -> None:
     with open(path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=False)
+        yaml.dump(data, f, Dumper=YamlDumper, sort_keys=False, allow_unicode=False)
 
 
 def _ensure_dict(root: dict, key: str) -> dict: